@@ -0,0 +1,125 @@
+import time
+
+import numpy as np
+
+# 📌 Rate levels, lowest power first: (IMU sample rate Hz, analysis interval s)
+RATE_LEVELS = [
+    (10, 5.0),
+    (25, 2.0),
+    (50, 1.0),
+]
+
+# 📌 Ramp to full rate on any of these
+RAMP_BPM = 12            # Breathing slower than this
+RAMP_GAP = 8             # Seconds since the last breath
+MOTION_THRESHOLD = 0.5   # m/s² RMS of the non-respiratory part of the signal; quiet breathing in
+                         # the labelled trials is ~0.3 median, ~0.35 p75 (parameter_sweep.py --motion)
+MIN_QUALITY = 0.6        # Breath-interval regularity, 0..1
+
+# Seconds of stable breathing required before stepping down one level
+STEP_DOWN_AFTER = 30
+
+# 📌 Energy model (Pi Zero 2 W class board)
+CPU_ACTIVE_WATTS = 1.2   # Extra draw per fully busy core over idle
+SAMPLE_JOULES = 0.0005   # Bit-banged I2C transaction plus BNO055 wake per sample
+
+def signal_quality(peaks, fs):
+    """
+    Breath-interval regularity: 1 - coefficient of variation of peak gaps.
+
+    Returns None when there are too few breaths to judge; slow breathing is
+    already covered by the BPM and gap checks.
+    """
+    if len(peaks) < 3:
+        return None
+    intervals = np.diff(peaks) / fs
+    return float(max(0.0, 1.0 - np.std(intervals) / np.mean(intervals)))
+
+def motion_level(raw_signal, filtered_signal):
+    """ RMS of what the respiratory low-pass removed, i.e. body motion and noise. """
+    return float(np.sqrt(np.mean((np.asarray(raw_signal) - filtered_signal) ** 2)))
+
+class CostMeter:
+    """
+    CPU-seconds, samples and estimated energy normalised to one monitored hour.
+
+    sample_joules is charged per sample; pass 0 where the samples are only
+    counted, so that sampling energy is charged once, by the sampler.
+    """
+
+    def __init__(self, sample_joules=SAMPLE_JOULES):
+        self.start_wall = time.monotonic()
+        self.start_cpu = time.process_time()
+        self.samples = 0
+        self.sample_joules = sample_joules
+
+    def report(self):
+        hours = max(time.monotonic() - self.start_wall, 1e-9) / 3600
+        cpu_seconds = time.process_time() - self.start_cpu
+        energy = cpu_seconds * CPU_ACTIVE_WATTS + self.samples * self.sample_joules
+        return {
+            "monitored_hours": hours,
+            "cpu_seconds_per_hour": cpu_seconds / hours,
+            "samples_per_hour": self.samples / hours,
+            "energy_joules_per_hour": energy / hours,
+            "energy_mwh_per_hour": energy / hours / 3.6,
+        }
+
+class AdaptiveScheduler:
+    """
+    Picks IMU sample rate and analysis interval from breathing stability.
+
+    Any sign of risk (low BPM, long gap since the last breath, motion or a
+    poor-quality signal) jumps straight to full rate. The rate only steps down
+    one level after STEP_DOWN_AFTER seconds of stable, good-quality breathing.
+    """
+
+    def __init__(self, levels=RATE_LEVELS, step_down_after=STEP_DOWN_AFTER, clock=time.monotonic):
+        self.levels = levels
+        self.step_down_after = step_down_after
+        self.clock = clock
+        self.level = len(levels) - 1
+        self.stable_since = None
+        self.last_update = None
+        # Analyzer CPU only: sampling energy is charged by the sampler's meter (i2c_test.py)
+        self.cost = CostMeter(sample_joules=0.0)
+
+    @property
+    def fs(self):
+        return self.levels[self.level][0]
+
+    @property
+    def max_fs(self):
+        return max(rate for rate, _ in self.levels)
+
+    @property
+    def analysis_interval(self):
+        return self.levels[self.level][1]
+
+    @property
+    def sample_period(self):
+        return 1.0 / self.fs
+
+    def update(self, bpm, since_breath, quality, motion):
+        """ Feed one analysis tick; returns the level to run at next. """
+        now = self.clock()
+        if self.last_update is not None:
+            # Samples the sampler was asked to take at the rate that just ended
+            self.cost.samples += int(self.fs * (now - self.last_update))
+        self.last_update = now
+
+        risky = (bpm < RAMP_BPM or since_breath > RAMP_GAP
+                 or motion > MOTION_THRESHOLD or (quality is not None and quality < MIN_QUALITY))
+
+        if risky:
+            self.level = len(self.levels) - 1
+            self.stable_since = None
+        elif self.stable_since is None:
+            self.stable_since = now
+        elif now - self.stable_since >= self.step_down_after and self.level > 0:
+            self.level -= 1
+            self.stable_since = now
+        return self.level
+
+    def report(self):
+        return {"level": self.level, "fs": self.fs, **self.cost.report()}
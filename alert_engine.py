@@ -0,0 +1,221 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# 📌 Alert thresholds
+BRADYPNEA_RAISE_BPM = 10     # Raise below this rate
+BRADYPNEA_CLEAR_BPM = 12     # Clear only once back above this rate
+BRADYPNEA_RAISE_DWELL = 5    # Seconds the low rate must persist before raising
+BRADYPNEA_CLEAR_DWELL = 5    # Seconds the recovered rate must persist before clearing
+APNEA_GAP = 15               # Seconds without a breath before raising apnea
+APNEA_CLEAR_DWELL = 0        # Seconds of resumed breathing before clearing apnea
+LATENCY_TARGET = 1.5         # Seconds from newest sample to notification
+
+# Pins shared with sensor-main.py / timer-main.py
+BUZZER_PIN = 12
+RED_LIGHT_PIN = 0
+
+AlertEvent = namedtuple("AlertEvent", ["kind", "state", "onset", "sample_time", "acquired_at", "notified_at", "value"])
+
+class Hysteresis:
+    """
+    Two-threshold condition with minimum dwell times.
+
+    The condition is raised once `raising` has held for raise_dwell seconds and
+    cleared once `clearing` has held for clear_dwell seconds. Anything in
+    between resets the pending timer without changing state.
+    """
+
+    def __init__(self, raise_dwell=0, clear_dwell=0):
+        self.raise_dwell = raise_dwell
+        self.clear_dwell = clear_dwell
+        self.active = False
+        self.pending_since = None
+        self.onset = None
+
+    def step(self, now, raising, clearing):
+        """ Advance to `now`; returns "raised", "cleared" or None. """
+        trigger, dwell = (clearing, self.clear_dwell) if self.active else (raising, self.raise_dwell)
+        if not trigger:
+            self.pending_since = None
+            return None
+        if self.pending_since is None:
+            self.pending_since = now
+        if now - self.pending_since < dwell:
+            return None
+
+        self.active = not self.active
+        self.onset = self.pending_since if self.active else None
+        self.pending_since = None
+        return "raised" if self.active else "cleared"
+
+class AlertEngine:
+    """
+    Turns per-tick detector output into deduplicated alert notifications.
+
+    Bradypnea uses raise/clear BPM thresholds with dwell times. Apnea is driven
+    by the time since the last detected breath, so a flat-line window with no
+    peaks at all still raises it. Notifiers are only called on state changes.
+
+    Parameters:
+        notifiers (list): Callables taking an AlertEvent.
+        clock (callable): Wall clock used to timestamp notifications. Should match
+            the clock of the `acquired_at` values passed to update().
+    """
+
+    def __init__(self, notifiers=None, bradypnea_bpm=BRADYPNEA_RAISE_BPM,
+                 bradypnea_clear_bpm=BRADYPNEA_CLEAR_BPM, bradypnea_dwell=BRADYPNEA_RAISE_DWELL,
+                 bradypnea_clear_dwell=BRADYPNEA_CLEAR_DWELL, apnea_gap=APNEA_GAP,
+                 apnea_clear_dwell=APNEA_CLEAR_DWELL, latency_target=LATENCY_TARGET, clock=time.time):
+        self.notifiers = list(notifiers or [])
+        self.bradypnea_bpm = bradypnea_bpm
+        self.bradypnea_clear_bpm = bradypnea_clear_bpm
+        self.apnea_gap = apnea_gap
+        self.latency_target = latency_target
+        self.clock = clock
+        self.conditions = {
+            "bradypnea": Hysteresis(bradypnea_dwell, bradypnea_clear_dwell),
+            "apnea": Hysteresis(0, apnea_clear_dwell),
+        }
+        self.last_breath = None
+        self.events = []
+        self.latencies = []
+
+    def active(self, kind):
+        return self.conditions[kind].active
+
+    def update(self, now, bpm, last_breath=None, acquired_at=None):
+        """
+        Feed one detector tick.
+
+        Parameters:
+            now (float): Timestamp (s) of the newest sample in the window.
+            bpm (float): Breaths per minute for the window.
+            last_breath (float): Timestamp of the newest detected breath, or None
+                if the window had no peaks. Older breaths are remembered.
+            acquired_at (float): Clock time the newest sample was acquired, used
+                for sample-to-alert latency.
+
+        Returns:
+            list: AlertEvents emitted on this tick.
+        """
+        if last_breath is not None and (self.last_breath is None or last_breath > self.last_breath):
+            self.last_breath = last_breath
+        if self.last_breath is None:
+            # Start the apnea timer at the first tick so a flat line from startup still alerts
+            self.last_breath = now
+
+        since_breath = now - self.last_breath
+        apnea = since_breath > self.apnea_gap
+        emitted = []
+        for kind, raising, clearing, value in (
+            ("bradypnea", bpm < self.bradypnea_bpm, bpm >= self.bradypnea_clear_bpm, bpm),
+            ("apnea", apnea, not apnea, since_breath),
+        ):
+            condition = self.conditions[kind]
+            state = condition.step(now, raising, clearing)
+            if state is None:
+                continue
+            onset = self.last_breath + self.apnea_gap if kind == "apnea" and state == "raised" else condition.onset
+            emitted.append(self._notify(kind, state, onset, now, acquired_at, value))
+        return emitted
+
+    def _notify(self, kind, state, onset, now, acquired_at, value):
+        for notifier in self.notifiers:
+            try:
+                notifier(AlertEvent(kind, state, onset, now, acquired_at, None, value))
+            except Exception as e:
+                print("Error:", e)
+        event = AlertEvent(kind, state, onset, now, acquired_at, self.clock(), value)
+        self.events.append(event)
+        if state == "raised" and acquired_at is not None:
+            latency = event.notified_at - acquired_at
+            self.latencies.append(latency)
+            if latency > self.latency_target:
+                print(f"⚠️ Alert latency {latency:.2f}s over {self.latency_target:.2f}s target")
+        return event
+
+    def latency_report(self):
+        """ Sample-to-alert latency statistics for every raised alert. """
+        if not self.latencies:
+            return {"alerts": 0}
+        latencies = np.array(self.latencies)
+        return {
+            "alerts": len(latencies),
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "max": float(latencies.max()),
+            "over_target": int(np.sum(latencies > self.latency_target)),
+        }
+
+# 📌 Notifiers
+def print_notifier(event):
+    if event.kind == "bradypnea":
+        if event.state == "raised":
+            print(f"⚠️ Bradypnea Detected: BPM = {event.value:.2f}")
+        else:
+            print(f"✅ Bradypnea cleared: BPM = {event.value:.2f}")
+    elif event.state == "raised":
+        print(f"🚨 Apnea Detected: No breath for {event.value:.0f} sec!")
+    else:
+        print("✅ Apnea cleared: breathing resumed")
+
+def gpio_notifier(gpio, print_msg=None, buzzer_pin=BUZZER_PIN, led_pin=RED_LIGHT_PIN):
+    """
+    Build a notifier driving the buzzer, red LED and LCD.
+
+    Only one process may own these pins. sensor-main.py and timer-main.py
+    drive the buzzer low and rewrite the LCD every REFRESH_FREQUENCY, so
+    they would overwrite an alert within 0.5 s; don't run them alongside a
+    monitor using this notifier.
+
+    Parameters:
+        gpio: The RPi.GPIO module, with the pins already set up as outputs.
+        print_msg (callable): LCD writer such as print_msg() in sensor-main.py.
+    """
+    raised = set()
+
+    def notify(event):
+        if event.state == "raised":
+            raised.add(event.kind)
+        else:
+            raised.discard(event.kind)
+
+        level = gpio.HIGH if raised else gpio.LOW
+        gpio.output(buzzer_pin, level)
+        gpio.output(led_pin, level)
+        if print_msg is not None:
+            # One alert per line of the 16x2 LCD
+            print_msg("\n".join(f"!! {kind.upper()} !!" for kind in sorted(raised)) or "Status: Normal \n")
+
+    return notify
+
+def open_gpio_notifier(buzzer_pin=BUZZER_PIN, led_pin=RED_LIGHT_PIN):
+    """
+    Set up the buzzer, red LED and LCD as sensor-main.py does and return a
+    gpio_notifier() driving them, or None when not running on the Pi.
+
+    Takes over the pins sensor-main.py / timer-main.py use; see gpio_notifier().
+    """
+    try:
+        import RPi.GPIO as GPIO
+        import board
+        import digitalio
+        import adafruit_character_lcd.character_lcd as character_lcd
+    except (ImportError, RuntimeError):
+        return None
+
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setup(buzzer_pin, GPIO.OUT)
+    GPIO.setup(led_pin, GPIO.OUT)
+
+    # LCD pin configuration shared with sensor-main.py
+    lcd_pins = [digitalio.DigitalInOut(pin) for pin in (board.D25, board.D24, board.D23, board.D17, board.D18, board.D22)]
+    lcd = character_lcd.Character_LCD_Mono(*lcd_pins, 16, 2)
+
+    def print_msg(string):
+        lcd.clear()
+        lcd.message = string
+
+    return gpio_notifier(GPIO, print_msg, buzzer_pin, led_pin)
@@ -0,0 +1,190 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.signal as signal
+
+# 📌 Chunking defaults
+CHUNK_SECONDS = 300
+CSV_CHUNK_ROWS = 100000  # CSV rows parsed at a time while preparing a recording
+TRANSIENT_TOL = 1e-6  # Impulse response tail, relative to its peak, treated as settled
+
+def chebyshev_sos(fs=50, cutoff=0.5, order=4, rs=40):
+    """ Same design as chebyshev_filter() in live_respiratory_depression.py. """
+    return signal.cheby2(order, rs, cutoff / (0.5 * fs), btype='low', analog=False, output='sos')
+
+def transient_length(sos, tol=TRANSIENT_TOL):
+    """ Samples until the filter's impulse response stays below tol of its peak. """
+    n = 256
+    while True:
+        impulse = np.zeros(n)
+        impulse[0] = 1.0
+        h = np.abs(signal.sosfilt(sos, impulse))
+        above = np.nonzero(h > tol * h.max())[0]
+        if above[-1] < n // 2:
+            return int(above[-1]) + 1
+        n *= 2
+
+def _csv_chunks(csv_paths, rows):
+    """
+    Stream per-axis CSV files as (t, axes) blocks of up to `rows` rows.
+
+    Same conventions as load_recording(): axes are truncated to the shortest
+    file, share the x-axis timestamps and NaN readings become 0. Rows with a
+    NaN timestamp are dropped.
+    """
+    readers = [pd.read_csv(path, header=None, names=["Acc", "Time"], chunksize=rows) for path in csv_paths]
+    for frames in zip(*readers):
+        n = min(len(df) for df in frames)
+        t = frames[0]["Time"].to_numpy(dtype=float)[:n]
+        axes = np.column_stack([np.nan_to_num(df["Acc"].to_numpy(dtype=float)[:n], nan=0.0) for df in frames])
+        valid = ~np.isnan(t)
+        yield t[valid], axes[valid]
+
+def prepare_recording(csv_paths, out_path, fs=50, rows=CSV_CHUNK_ROWS):
+    """
+    Convert per-axis CSV files into a uniform-rate (n, 3) .npy file.
+
+    The result is what the chunk workers memory-map, so the parsing cost is
+    paid once per recording. The CSVs are streamed twice, `rows` at a time:
+    once for the time span (which fixes the output shape), then to resample
+    each block straight into a memory-mapped output, so memory stays bounded
+    end to end. Matches resample_uniform() over the whole recording for
+    increasing timestamps (np.interp needs them; a file holding several runs
+    with restarting times is meaningless to either).
+    """
+    t_first = t_last = None
+    for t, _ in _csv_chunks(csv_paths, rows):
+        if len(t):
+            t_first = t[0] if t_first is None else t_first
+            t_last = t[-1]
+    step = 1.0 / fs
+    n = len(np.arange(t_first, t_last, step)) if t_first is not None else 0
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float64, shape=(n, 3))
+
+    # Grid points are filled once the block holding the sample after them is read;
+    # the previous block's last sample is carried over to bridge the boundary
+    done, prev_t, prev_axes = 0, np.empty(0), np.empty((0, 3))
+    for t, axes in _csv_chunks(csv_paths, rows):
+        t, axes = np.concatenate([prev_t, t]), np.concatenate([prev_axes, axes])
+        if not len(t):
+            continue
+        end = min(n, int(np.floor((t[-1] - t_first) / step)) + 1)
+        if end > done:
+            grid = t_first + np.arange(done, end) * step
+            out[done:end] = np.column_stack([np.interp(grid, t, axes[:, i]) for i in range(3)])
+            done = end
+        prev_t, prev_axes = t[-1:], axes[-1:]
+    if done < n:
+        out[done:] = prev_axes[-1]
+    out.flush()
+    del out
+    return out_path
+
+def chunk_bounds(n, chunk, overlap):
+    """ (core_start, core_end, ext_start, ext_end) for every chunk. """
+    return [(start, min(start + chunk, n), max(0, start - overlap), min(n, start + chunk + overlap))
+            for start in range(0, n, chunk)]
+
+def _axis_range(path, start, end):
+    axes = np.load(path, mmap_mode="r")[start:end]
+    return axes.min(axis=0), axes.max(axis=0)
+
+def _filter_chunk(path, out_path, axis, sos, bounds, fs, peak_distance):
+    """
+    Filter one overlapping chunk and keep only its core.
+
+    Writes the core straight into the shared output file and returns the
+    breath peaks (absolute indices) that fall inside the core.
+    """
+    core_start, core_end, ext_start, ext_end = bounds
+    segment = np.load(path, mmap_mode="r")[ext_start:ext_end, axis]
+    filtered = signal.sosfiltfilt(sos, np.nan_to_num(segment, nan=0.0))
+
+    out = np.load(out_path, mmap_mode="r+")
+    out[core_start:core_end] = filtered[core_start - ext_start:core_end - ext_start]
+    out.flush()
+
+    peaks, props = signal.find_peaks(filtered, height=0, distance=fs * peak_distance)
+    peaks = peaks + ext_start
+    keep = (peaks >= core_start) & (peaks < core_end)
+    return peaks[keep], props["peak_heights"][keep]
+
+def enforce_distance(peaks, heights, distance):
+    """ Drop the lower of any two stitched peaks closer than distance samples. """
+    kept_peaks, kept_heights = [], []
+    for peak, height in zip(peaks, heights):
+        if kept_peaks and peak - kept_peaks[-1] < distance:
+            if height > kept_heights[-1]:
+                kept_peaks[-1], kept_heights[-1] = peak, height
+            continue
+        kept_peaks.append(peak)
+        kept_heights.append(height)
+    return np.array(kept_peaks, dtype=int)
+
+def process_recording(path, fs=50, chunk_seconds=CHUNK_SECONDS, workers=None, cutoff=0.5, order=4, rs=40,
+                      peak_distance=2):
+    """
+    Filter a long recording and find its breaths in parallel, bounded-memory chunks.
+
+    Chunks overlap by the filter's transient length (plus the peak spacing), so
+    each core matches a single whole-recording sosfiltfilt() within tolerance.
+    The dominant axis is chosen from per-chunk min/max, as np.ptp over the
+    whole recording would.
+
+    Returns:
+        filtered (memmap): Filtered dominant axis, stored next to the input.
+        peaks (array): Breath peak indices.
+        bpm (float): Breaths per minute over the recording.
+    """
+    n = np.load(path, mmap_mode="r").shape[0]
+    sos = chebyshev_sos(fs, cutoff, order, rs)
+    overlap = transient_length(sos) + int(fs * peak_distance)
+    bounds = chunk_bounds(n, max(int(fs * chunk_seconds), overlap), overlap)
+
+    out_path = os.path.splitext(path)[0] + ".filtered.npy"
+    np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float64, shape=(n,)).flush()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        ranges = list(pool.map(_axis_range, *zip(*[(path, b[0], b[1]) for b in bounds])))
+        p2p = np.max([hi for _, hi in ranges], axis=0) - np.min([lo for lo, _ in ranges], axis=0)
+        p2p_x, p2p_y, p2p_z = p2p
+        axis = 0 if p2p_x > p2p_y and p2p_x > p2p_z else (1 if p2p_y > p2p_x and p2p_y > p2p_z else 2)
+
+        futures = [pool.submit(_filter_chunk, path, out_path, axis, sos, b, fs, peak_distance) for b in bounds]
+        parts = [future.result() for future in futures]
+
+    peaks = enforce_distance(np.concatenate([p for p, _ in parts]), np.concatenate([h for _, h in parts]),
+                             fs * peak_distance)
+    bpm = len(peaks) / (n / (fs * 60)) if n else 0
+    return np.load(out_path, mmap_mode="r"), peaks, bpm
+
+def single_pass(path, fs=50, cutoff=0.5, order=4, rs=40, peak_distance=2):
+    """ Reference: whole recording in memory, one sosfiltfilt and find_peaks. """
+    axes = np.load(path)
+    p2p_x, p2p_y, p2p_z = np.ptp(axes, axis=0)
+    axis = 0 if p2p_x > p2p_y and p2p_x > p2p_z else (1 if p2p_y > p2p_x and p2p_y > p2p_z else 2)
+    filtered = signal.sosfiltfilt(chebyshev_sos(fs, cutoff, order, rs), np.nan_to_num(axes[:, axis], nan=0.0))
+    peaks, _ = signal.find_peaks(filtered, height=0, distance=fs * peak_distance)
+    return filtered, peaks
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked parallel filtering of one long recording.")
+    parser.add_argument("folder", nargs="?", default="./404-imu-data/pi-data/")
+    parser.add_argument("--fs", type=int, default=50)
+    parser.add_argument("--chunk-seconds", type=float, default=CHUNK_SECONDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--check", action="store_true", help="Compare against a single in-memory pass")
+    args = parser.parse_args()
+
+    csv_paths = [os.path.join(args.folder, f"{axis}-axis.csv") for axis in "xyz"]
+    path = prepare_recording(csv_paths, os.path.join(args.folder, "recording.npy"), args.fs)
+    filtered, peaks, bpm = process_recording(path, args.fs, args.chunk_seconds, args.workers)
+    print(f"🫁 {len(peaks)} breaths, {bpm:.2f} BPM over {len(filtered) / args.fs:.0f} s")
+
+    if args.check:
+        reference, reference_peaks = single_pass(path, args.fs)
+        print("Max filtered difference:", float(np.max(np.abs(filtered - reference))))
+        print("Peaks match:", np.array_equal(peaks, reference_peaks))
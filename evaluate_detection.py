@@ -0,0 +1,304 @@
+import argparse
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from alert_engine import AlertEngine
+from live_respiratory_depression import (BREATH_PROMINENCE, chebyshev_filter, detect_breathing_rate, noise_level,
+                                         select_dominant_axis)
+
+# 📌 Label manifest and result cache locations
+DATA_ROOT = "./404-imu-data/"
+MANIFEST_FILE = DATA_ROOT + "labels.json"
+CACHE_DIR = "./.eval-cache/"
+
+# Source files behind a cached result; editing any of them invalidates the cache
+DETECTOR_SOURCES = ["live_respiratory_depression.py", "alert_engine.py", "evaluate_detection.py"]
+
+# 📌 Detector settings used by the live monitor
+DEFAULT_PARAMS = {
+    "fs": 50,
+    "window_size": 10,
+    "cutoff": 0.5,
+    "order": 4,
+    "rs": 40,
+    "peak_distance": 2,
+    "prominence": BREATH_PROMINENCE,
+    "skip": 3,
+    "apnea_gap": 15,
+    "tick": 1.0,
+}
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    """ Load the list of labelled trials. """
+    with open(manifest_file) as f:
+        return json.load(f)["trials"]
+
+def trial_files(trial, data_root=DATA_ROOT):
+    """ Return the x/y/z CSV paths for one labelled trial. """
+    folder = os.path.join(data_root, trial["folder"])
+    return [os.path.join(folder, f"{axis}-axis{trial['trial']}.csv") for axis in "xyz"]
+
+def recording_hash(paths):
+    """ SHA-256 over the raw bytes of every axis file of a recording. """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+@lru_cache(maxsize=None)
+def detector_hash(sources=tuple(DETECTOR_SOURCES)):
+    """ SHA-256 over the source of the detector, alert engine and scoring code. """
+    root = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sources:
+        with open(os.path.join(root, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def load_recording(paths):
+    """
+    Read the per-axis CSV files of one recording.
+
+    Axis files can differ by a row or two, so all axes are truncated to the
+    shortest one and share the x-axis timestamps.
+
+    Returns:
+        t, x, y, z (arrays): Timestamps (s) and acceleration per axis.
+    """
+    frames = [pd.read_csv(path, header=None, names=["Acc", "Time"]) for path in paths]
+    n = min(len(df) for df in frames)
+    t = frames[0]["Time"].to_numpy(dtype=float)[:n]
+    x, y, z = (np.nan_to_num(df["Acc"].to_numpy(dtype=float)[:n], nan=0.0) for df in frames)
+    return t, x, y, z
+
+def splice_flat(t, x, y, z, at, duration, seed=0):
+    """
+    Insert `duration` seconds of still-sensor signal at time `at` (s from recording start).
+
+    Builds a synthetic apnea from a real recording. A still sensor still reads
+    its offset plus noise, so each axis ramps linearly from its median over
+    the second before the splice to its median over the second after it (no
+    step edges), plus Gaussian noise at the axis's noise_level(). Inserted
+    samples use the recording's median spacing and later samples are shifted
+    back by `duration`.
+    """
+    t0 = np.nanmin(t)
+    i = int(np.searchsorted(t, t0 + at))
+    dt = float(np.nanmedian(np.diff(t)))
+    flat_t = t0 + at + np.arange(0, duration, dt)
+    edge = max(1, int(round(1.0 / dt)))
+    ramp = np.linspace(0, 1, len(flat_t))
+    rng = np.random.default_rng(seed)
+
+    spliced = []
+    for axis in (x, y, z):
+        before, after = np.median(axis[max(i - edge, 0):i]), np.median(axis[i:i + edge])
+        still = before + (after - before) * ramp + rng.normal(0, noise_level(axis), len(flat_t))
+        spliced.append(np.concatenate([axis[:i], still, axis[i:]]))
+    return (np.concatenate([t[:i], flat_t, t[i:] + duration]), *spliced)
+
+def trial_recording(trial, data_root=DATA_ROOT):
+    """ Load a trial's recording, applying its synthetic "splice" if it has one. """
+    t, x, y, z = load_recording(trial_files(trial, data_root))
+    if "splice" in trial:
+        t, x, y, z = splice_flat(t, x, y, z, trial["splice"]["at"], trial["splice"]["duration"])
+    return t, x, y, z
+
+def resample_uniform(t, values, fs):
+    """ Linearly resample irregular samples onto a uniform grid at fs Hz. """
+    valid = ~np.isnan(t)
+    t, values = t[valid], values[valid]
+    grid = np.arange(t[0], t[-1], 1.0 / fs)
+    return grid, np.interp(grid, t, values)
+
+def detector_tick(x, y, z, params):
+    """
+    Run one tick of the live detector on a window of samples.
+
+    Mirrors monitor_breathing(): dominant axis, skip startup samples,
+    Chebyshev filter, then peak-based BPM gated on the window's noise level.
+    """
+    fs = params["fs"]
+    dominant_signal = select_dominant_axis(x, y, z)[params["skip"]:]
+    filtered_signal = chebyshev_filter(dominant_signal, fs=fs, cutoff=params["cutoff"],
+                                       order=params["order"], rs=params["rs"])
+    return detect_on_filtered(filtered_signal, params, noise_level(dominant_signal))
+
+def detect_on_filtered(filtered_signal, params, noise_std=0.0):
+    """ Peak-based BPM on an already filtered window; returns (bpm, peaks). """
+    return detect_breathing_rate(filtered_signal, params["fs"], peak_distance=params["peak_distance"],
+                                 noise_std=noise_std, prominence=params["prominence"])
+
+def tick_ends(n_samples, params):
+    """ Sample index one past the end of every live-monitor window. """
+    samples_to_read = int(params["fs"] * params["window_size"])
+    step = max(1, int(round(params["fs"] * params["tick"])))
+    return range(samples_to_read, n_samples + 1, step)
+
+def last_breath_time(peaks, end, params):
+    """ Time (s from recording start) of the newest peak in a window ending at `end`. """
+    if not len(peaks):
+        return None
+    start = end - int(params["fs"] * params["window_size"]) + params["skip"]
+    return (start + peaks[-1]) / params["fs"]
+
+def alert_ticks(raw_ticks, params):
+    """
+    Feed (tick_time, bpm, last_breath) ticks through an AlertEngine.
+
+    Returns:
+        ticks (list): One (tick_time, bpm, apnea_active) tuple per tick.
+    """
+    engine = AlertEngine(apnea_gap=params["apnea_gap"])
+    ticks = []
+    for tick_time, bpm, last_breath in raw_ticks:
+        engine.update(tick_time, bpm, last_breath)
+        ticks.append((tick_time, bpm, engine.active("apnea")))
+    return ticks
+
+def replay_recording(t, x, y, z, params):
+    """
+    Replay a recording through the detector and alert engine one tick at a time.
+
+    Returns:
+        ticks (list): One (tick_time, bpm, apnea_detected) tuple per tick,
+        with tick_time measured in seconds from the start of the recording.
+    """
+    fs = params["fs"]
+    grid, x = resample_uniform(t, x, fs)
+    _, y = resample_uniform(t, y, fs)
+    _, z = resample_uniform(t, z, fs)
+    samples_to_read = int(fs * params["window_size"])
+
+    raw_ticks = []
+    for end in tick_ends(len(grid), params):
+        start = end - samples_to_read
+        bpm, peaks = detector_tick(x[start:end], y[start:end], z[start:end], params)
+        raw_ticks.append(((end - 1) / fs, float(bpm), last_breath_time(peaks, end, params)))
+    return alert_ticks(raw_ticks, params)
+
+def count_breaths(t, x, y, z, params):
+    """ Count breaths over a whole recording with a single offline pass. """
+    fs = params["fs"]
+    _, x = resample_uniform(t, x, fs)
+    _, y = resample_uniform(t, y, fs)
+    _, z = resample_uniform(t, z, fs)
+    _, peaks = detector_tick(x, y, z, params)
+    return len(peaks)
+
+def score_trial(trial, t, x, y, z, params):
+    """ Run the detector over one recording and compare it against its labels. """
+    duration = float(np.nanmax(t) - np.nanmin(t))
+    return score_ticks(trial, duration, count_breaths(t, x, y, z, params),
+                       replay_recording(t, x, y, z, params), params)
+
+def score_ticks(trial, duration, breaths, ticks, params):
+    """
+    Compare a breath count and replayed ticks against the labels of one trial.
+
+    Apnea events are labelled as [start, end] seconds. An alert tick counts
+    towards an event if it lands between the event start and one window
+    after its end. An alert episode (a run of apnea ticks) with no tick
+    counting towards any event is one false alert.
+    """
+    true_bpm = trial["breaths"] / (duration / 60)
+    tick_bpm = [bpm for _, bpm, _ in ticks]
+    bpm_error = float(np.mean(np.abs(np.array(tick_bpm) - true_bpm))) if tick_bpm else None
+
+    events = trial.get("apnea", [])
+    alert_times = [tick_time for tick_time, _, apnea in ticks if apnea]
+    latencies, missed = [], 0
+    for start, end in events:
+        hits = [a for a in alert_times if start <= a <= end + params["window_size"]]
+        if hits:
+            latencies.append(hits[0] - start)
+        else:
+            missed += 1
+    episodes, current = [], None
+    for tick_time, _, apnea in ticks:
+        if apnea:
+            current = current if current is not None else []
+            current.append(tick_time)
+        elif current is not None:
+            episodes.append(current)
+            current = None
+    if current is not None:
+        episodes.append(current)
+    false_apnea = sum(
+        1 for episode in episodes
+        if not any(start <= a <= end + params["window_size"] for a in episode for start, end in events)
+    )
+
+    return {
+        "duration": duration,
+        "breaths": breaths,
+        "breath_error": breaths - trial["breaths"],
+        "true_bpm": true_bpm,
+        "bpm_error": bpm_error,
+        "ticks": len(ticks),
+        "false_apnea": false_apnea,
+        "missed_apnea": missed,
+        "alert_latency": latencies,
+    }
+
+def evaluate_trial(trial, params=None, data_root=DATA_ROOT, cache_dir=CACHE_DIR):
+    """ Score one trial, reusing a cached result for an unchanged recording and detector. """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    paths = trial_files(trial, data_root)
+
+    key = hashlib.sha256(json.dumps(
+        [recording_hash(paths), detector_hash(), trial, params], sort_keys=True).encode()).hexdigest()
+    cache_file = os.path.join(cache_dir, key + ".json") if cache_dir else None
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file) as f:
+            return json.load(f)
+
+    result = score_trial(trial, *trial_recording(trial, data_root), params)
+
+    if cache_file:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_file, "w") as f:
+            json.dump(result, f)
+    return result
+
+def summarize(results):
+    """ Aggregate per-trial results into overall accuracy figures. """
+    bpm_errors = [r["bpm_error"] for r in results if r["bpm_error"] is not None]
+    latencies = [l for r in results for l in r["alert_latency"]]
+    return {
+        "trials": len(results),
+        "breath_mae": float(np.mean([abs(r["breath_error"]) for r in results])),
+        "bpm_mae": float(np.mean(bpm_errors)) if bpm_errors else None,
+        "false_apnea": sum(r["false_apnea"] for r in results),
+        "missed_apnea": sum(r["missed_apnea"] for r in results),
+        "max_alert_latency": max(latencies) if latencies else None,
+    }
+
+def evaluate(manifest_file=MANIFEST_FILE, params=None, data_root=DATA_ROOT, cache_dir=CACHE_DIR):
+    """ Evaluate every labelled trial and return (per-trial results, summary). """
+    trials = load_manifest(manifest_file)
+    results = [evaluate_trial(trial, params, data_root, cache_dir) for trial in trials]
+    return list(zip(trials, results)), summarize(results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score the breathing detector against labelled recordings.")
+    parser.add_argument("--manifest", default=MANIFEST_FILE)
+    parser.add_argument("--fs", type=int, default=DEFAULT_PARAMS["fs"])
+    parser.add_argument("--window-size", type=int, default=DEFAULT_PARAMS["window_size"])
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    rows, summary = evaluate(args.manifest, {"fs": args.fs, "window_size": args.window_size},
+                             cache_dir=None if args.no_cache else CACHE_DIR)
+
+    for trial, r in rows:
+        bpm_error = f"{r['bpm_error']:.2f}" if r["bpm_error"] is not None else "n/a"
+        print(f"{trial['folder']}/{trial['trial']}: breaths {r['breaths']}/{trial['breaths']}  "
+              f"BPM err {bpm_error}  false apnea {r['false_apnea']}  missed apnea {r['missed_apnea']}")
+    print("🫁 Summary:", summary)
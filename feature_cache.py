@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from evaluate_detection import (DEFAULT_PARAMS, DETECTOR_SOURCES, detect_on_filtered, detector_hash, detector_tick,
+                                load_recording, recording_hash, resample_uniform, tick_ends)
+from live_respiratory_depression import chebyshev_filter, noise_level, select_dominant_axis
+
+# 📌 Cache location and size bound
+FEATURE_CACHE_DIR = "./.feature-cache/"
+FEATURE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+class FeatureCache:
+    """
+    Content-addressed, size-bounded store of NumPy arrays.
+
+    Entries are .npz files named by a key hash. A hit refreshes the file's
+    mtime, and once the directory grows past max_bytes the least recently
+    used entries are deleted.
+    """
+
+    def __init__(self, cache_dir=FEATURE_CACHE_DIR, max_bytes=FEATURE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the arrays stored under key, computing and storing them on a miss.
+
+        compute() must return a dict of array-likes.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)
+            self.hits += 1
+            return arrays
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            pass  # Missing or torn entry: recompute
+
+        self.misses += 1
+        arrays = {name: np.asarray(value) for name, value in compute().items()}
+        # Unique temp file, so concurrent writers of one key never share a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.evict()
+        return arrays
+
+    def evict(self):
+        """ Delete least recently used entries until the cache fits in max_bytes. """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+# 📌 Pipeline stages: name -> (parent stage, parameters the stage depends on)
+STAGES = {
+    "parsed": (None, ()),
+    "resampled": ("parsed", ("fs",)),
+    "filtered": ("resampled", ("skip", "cutoff", "order", "rs")),
+    "peaks": ("filtered", ("peak_distance", "prominence")),
+    "window_metrics": ("resampled", ("skip", "cutoff", "order", "rs", "peak_distance", "prominence", "window_size",
+                                     "tick")),
+}
+
+# Source behind the stages: editing any of it invalidates every entry, as in evaluate_detection.py
+STAGE_SOURCES = tuple(DETECTOR_SOURCES) + ("feature_cache.py",)
+
+class FeaturePipeline:
+    """
+    Memoized feature extraction for one recording.
+
+    Stages: parsed arrays -> resampled signal -> filtered dominant axis ->
+    peaks, plus per-window metrics from the resampled signal. Each stage is
+    keyed by its parent's key plus its own parameters, with the input-file
+    hash and the detector_hash() of the stage source at the root. Keys never need the data, so a hit loads only that
+    stage, and changing a later stage's parameters only recomputes that stage.
+
+    Every stage method returns a dict of arrays.
+    """
+
+    def __init__(self, csv_paths, cache=None, params=None):
+        self.csv_paths = csv_paths
+        self.cache = cache if cache is not None else FeatureCache()
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.input_key = FeatureCache.key("input", recording_hash(csv_paths), detector_hash(STAGE_SOURCES))
+
+    def stage_key(self, name):
+        parent, param_names = STAGES[name]
+        parent_key = self.input_key if parent is None else self.stage_key(parent)
+        return FeatureCache.key(name, parent_key, {key: self.params[key] for key in param_names})
+
+    def _stage(self, name, compute):
+        return self.cache.get_or_compute(self.stage_key(name), compute)
+
+    def parsed(self):
+        def compute():
+            t, x, y, z = load_recording(self.csv_paths)
+            return {"t": t, "x": x, "y": y, "z": z}
+        return self._stage("parsed", compute)
+
+    def resampled(self):
+        def compute():
+            parsed = self.parsed()
+            grid, x = resample_uniform(parsed["t"], parsed["x"], self.params["fs"])
+            return {"t": grid, "x": x,
+                    "y": resample_uniform(parsed["t"], parsed["y"], self.params["fs"])[1],
+                    "z": resample_uniform(parsed["t"], parsed["z"], self.params["fs"])[1]}
+        return self._stage("resampled", compute)
+
+    def filtered(self):
+        p = self.params
+
+        def compute():
+            resampled = self.resampled()
+            dominant = select_dominant_axis(resampled["x"], resampled["y"], resampled["z"])
+            axis = next(i for i, name in enumerate("xyz") if resampled[name] is dominant)
+            dominant = dominant[p["skip"]:]
+            return {"t": resampled["t"][p["skip"]:], "raw": dominant, "axis": axis,
+                    "filtered": chebyshev_filter(dominant, fs=p["fs"], cutoff=p["cutoff"], order=p["order"], rs=p["rs"])}
+        return self._stage("filtered", compute)
+
+    def peaks(self):
+        p = self.params
+
+        def compute():
+            filtered = self.filtered()
+            bpm, peaks = detect_on_filtered(filtered["filtered"], p, noise_level(filtered["raw"]))
+            return {"peaks": peaks, "bpm": bpm}
+        return self._stage("peaks", compute)
+
+    def window_metrics(self):
+        p = self.params
+
+        def compute():
+            resampled = self.resampled()
+            samples_to_read = int(p["fs"] * p["window_size"])
+            ends = list(tick_ends(len(resampled["t"]), p))
+            bpm = [detector_tick(*(resampled[axis][end - samples_to_read:end] for axis in "xyz"), p)[0]
+                   for end in ends]
+            return {"tick_time": (np.array(ends, dtype=float) - 1) / p["fs"], "bpm": np.array(bpm, dtype=float)}
+        return self._stage("window_metrics", compute)
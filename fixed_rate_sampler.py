@@ -0,0 +1,95 @@
+import time
+from collections import deque
+
+import numpy as np
+
+# 📌 Lateness histogram bin edges (ms past the scheduled slot)
+LATENESS_BINS_MS = [0, 0.5, 1, 2, 5, 10, 20, 50, float("inf")]
+
+# Recent lateness values kept for percentiles (the histogram covers the whole run)
+LATENESS_HISTORY = 10000
+
+class FixedRateSampler:
+    """
+    Deadline-based pacing on the monotonic clock.
+
+    Slots sit on an absolute schedule start + k * period, so the time spent on
+    I2C reads and writes is absorbed instead of accumulating as drift. When an
+    iteration overruns by a whole period or more, the missed slots are counted
+    and skipped rather than sampled in a burst.
+
+    Iterating yields the scheduled slot time in seconds since start, which makes
+    a uniform timestamp for the sample taken in that slot. `period` may be
+    changed between slots; the schedule continues from the current slot.
+
+        for t in FixedRateSampler(0.02):
+            save(t, sensor.linear_acceleration)
+    """
+
+    def __init__(self, period, clock=time.monotonic, sleep=time.sleep):
+        self.period = period
+        self.clock = clock
+        self.sleep = sleep
+        self.start = None
+        self.deadline = None
+
+        self.samples = 0
+        self.missed = 0
+        self.busy = 0.0
+        self.lateness = deque(maxlen=LATENESS_HISTORY)
+        self.late_max_ms = 0.0
+        self.histogram = np.zeros(len(LATENESS_BINS_MS) - 1, dtype=int)
+        self.woke_at = None
+
+    def wait(self):
+        """ Sleep until the next slot; returns its scheduled time since start. """
+        now = self.clock()
+        if self.start is None:
+            self.start = self.deadline = now
+        else:
+            if self.woke_at is not None:
+                self.busy += now - self.woke_at
+            self.deadline += self.period
+            if now - self.deadline >= self.period:
+                # Overran by whole slots: skip them instead of bursting to catch up
+                skipped = int((now - self.deadline) // self.period)
+                self.missed += skipped
+                self.deadline += skipped * self.period
+            if self.deadline > now:
+                self.sleep(self.deadline - now)
+
+        self.woke_at = self.clock()
+        late_ms = max(0.0, self.woke_at - self.deadline) * 1000
+        self.lateness.append(late_ms)
+        self.late_max_ms = max(self.late_max_ms, late_ms)
+        self.histogram[np.searchsorted(LATENESS_BINS_MS, late_ms, side="right") - 1] += 1
+        self.samples += 1
+        return self.deadline - self.start
+
+    def __iter__(self):
+        while True:
+            yield self.wait()
+
+    def stats(self):
+        """
+        Pacing statistics.
+
+        utilisation is the fraction of each slot spent working rather than
+        sleeping; near 1.0 the loop is at the hardware ceiling for this rate.
+        """
+        if not self.samples:
+            return {"samples": 0}
+        elapsed = max(self.woke_at - self.start, 1e-9)
+        lateness = np.array(self.lateness)
+        labels = [f"<{edge}ms" for edge in LATENESS_BINS_MS[1:-1]] + [f">={LATENESS_BINS_MS[-2]}ms"]
+        return {
+            "samples": self.samples,
+            "missed": self.missed,
+            "target_hz": 1.0 / self.period,
+            "achieved_hz": (self.samples - 1) / elapsed if self.samples > 1 else 0.0,
+            "late_p50_ms": float(np.percentile(lateness, 50)),
+            "late_p99_ms": float(np.percentile(lateness, 99)),
+            "late_max_ms": self.late_max_ms,
+            "utilisation": self.busy / elapsed,
+            "histogram": dict(zip(labels, self.histogram.tolist())),
+        }
@@ -8,6 +8,12 @@ import adafruit_bitbangio as bitbangio
 import csv
 import time
 
+from sample_journal import SampleJournal
+from shm_ring import SampleRing
+from adaptive_scheduler import CostMeter
+from fixed_rate_sampler import FixedRateSampler
+from uplink import UPLINK_HOST, UplinkClient
+
 SCL_PIN = 8
 SDA_PIN = 7
 
@@ -15,8 +21,22 @@ i2c = bitbangio.I2C(Pin(SCL_PIN), Pin(SDA_PIN))
 
 sensor = adafruit_bno055.BNO055_I2C(i2c)
 
+# Samples are batched into checksummed blocks instead of three CSV appends each
+journal = SampleJournal()
+
 start_time = time.time()
 
+# Newest samples are also published in shared memory for the analyzer/plotter
+ring = SampleRing.create(t0=start_time, sample_period=0.02)
+
+# Samples land on a fixed monotonic schedule; curr_time is the slot time
+sampler = FixedRateSampler(ring.sample_period)
+
+cost = CostMeter()
+
+# Samples are also batched to the central collector when UPLINK_HOST is set
+uplink = UplinkClient().start() if UPLINK_HOST else None
+
 print("Sensor Data")
 
 def save_to_csv(acc, time, filename):
@@ -30,27 +50,39 @@ def save_to_csv(acc, time, filename):
       writer.writerow(data)
 
 
-while True: 
-  gravity = [
-    #[sensor.gravity[0]],
-    #[sensor.gravity[1]],
-    [sensor.gravity[2]]
-    ]
+try:
+  for curr_time in sampler: 
+    # One I2C read per sample instead of one per axis
+    acc_x, acc_y, acc_z = sensor.linear_acceleration
+
+    lin_motion = [
+      #[acc_x],
+      #[acc_y],
+      [acc_z]
+      ]
+      
+    #if acc_x > 0.12 or acc_y > 0.12 or acc_z > 0.12:
+    if acc_z is not None and acc_z > 0.12:
     
-  lin_motion = [
-    #[sensor.linear_acceleration[0]],
-    #[sensor.linear_acceleration[1]],
-    [sensor.linear_acceleration[2]]
-    ]
-  
-  curr_time = time.time() - start_time
+      print(f"Reading: {lin_motion} {curr_time}C")
     
-  #if sensor.linear_acceleration[0] > 0.12 or sensor.linear_acceleration[1] > 0.12 or sensor.linear_acceleration[2] > 0.12:
-  if sensor.linear_acceleration[2] > 0.12:
-  
-    print(f"Reading: {lin_motion} {curr_time}C")
-  
-  save_to_csv(sensor.linear_acceleration[0], curr_time, 'x-axis')
-  save_to_csv(sensor.linear_acceleration[1], curr_time, 'y-axis')
-  save_to_csv(sensor.linear_acceleration[2], curr_time, 'z-axis')
-  time.sleep(0.01)
+    # Absolute time, so samples from successive runs in one journal stay ordered
+    journal.append(start_time + curr_time, acc_x, acc_y, acc_z)
+    ring.write(curr_time, acc_x, acc_y, acc_z)
+    cost.samples += 1
+    if uplink is not None:
+      uplink.add_sample(curr_time, acc_x, acc_y, acc_z)
+
+    # The analyzer lowers the rate while breathing is stable (see adaptive_scheduler.py)
+    sampler.period = ring.sample_period
+
+except KeyboardInterrupt:
+  journal.close()
+  ring.close()
+  ring.unlink()
+  print("Journal:", journal.stats())
+  print("Sampling cost:", cost.report())
+  print("Sampling jitter:", sampler.stats())
+  if uplink is not None:
+    uplink.close()
+    print("Uplink:", uplink.stats())
@@ -4,6 +4,8 @@ import scipy.signal as signal
 import time
 import matplotlib.pyplot as plt
 
+from feature_cache import FeaturePipeline
+
 def chebyshev_filter(signal_data, fs=50, cutoff=0.5, order=4, rs=40):
     """ Apply a 4th-order Chebyshev Type II low-pass filter. """
     nyquist = 0.5 * fs
@@ -78,11 +80,6 @@ def monitor_breathing(csv_file, fs=50, window_size=10):
             file_y = folder_path + "y-axis2.csv" 
             file_z = folder_path + "z-axis2.csv" 
 
-            # Read CSV files
-            df_x = pd.read_csv(file_x)
-            df_y = pd.read_csv(file_y)
-            df_z = pd.read_csv(file_z)
-
             # Read CSV files without headers, manually naming columns
             df_x = pd.read_csv(file_x, header=None, names=['X', 'Time'])
             df_y = pd.read_csv(file_y, header=None, names=['Y', 'Time'])
@@ -143,38 +140,19 @@ file_x = folder_path + "x-axis2.csv"
 file_y = folder_path + "y-axis2.csv" 
 file_z = folder_path + "z-axis2.csv" 
 
-# Read CSV files
-df_x = pd.read_csv(file_x)
-df_y = pd.read_csv(file_y)
-df_z = pd.read_csv(file_z)
-
-# Read CSV files without headers, manually naming columns
-df_x = pd.read_csv(file_x, header=None, names=['X', 'Time'])
-df_y = pd.read_csv(file_y, header=None, names=['Y', 'Time'])
-df_z = pd.read_csv(file_z, header=None, names=['Z', 'Time'])
-
-# Assuming all files have the same 'Time' column
-time = df_x['Time']
-x = df_x['X']
-y = df_y['Y']
-z = df_z['Z']
-
-# Determine dominant axis (max peak-to-peak motion)
-p2p_x = np.ptp(x)
-p2p_y = np.ptp(y)
-p2p_z = np.ptp(z)
-
-if p2p_x > p2p_y and p2p_x > p2p_z:
-    dominant_signal = x
-elif p2p_y > p2p_x and p2p_y > p2p_z:
-    dominant_signal = y
-else:
-    dominant_signal = z
+fs = 50  # Sampling frequency (adjust as needed)
+
+# Parse, resample to fs, pick the dominant axis and filter; every stage is
+# memoized on disk, keyed by the CSV contents and stage parameters
+pipeline = FeaturePipeline([file_x, file_y, file_z], params={"fs": fs, "skip": 3})
+stages = pipeline.filtered()
 
+# The raw plot shows the samples as recorded, on the axis the filtered stage chose
+# (filtering runs on the uniform fs grid)
+parsed = pipeline.parsed()
 N = 3
-dominant_signal = dominant_signal[N:]
-time = time[N:]
-dominant_signal = np.nan_to_num(dominant_signal, nan=0.0)
+time = parsed['t'][N:]
+dominant_signal = parsed["xyz"[int(stages['axis'])]][N:]
 
 
 # Plot dominant data
@@ -191,13 +169,11 @@ plt.legend()
 plt.grid()
 plt.show()
 
-fs = 50  # Sampling frequency (adjust as needed)
-
-filtered_signal = chebyshev_filter(dominant_signal, fs)
+filtered_signal = stages['filtered']
 print("First 10 values of filtered signal:", filtered_signal[:10])
 
 plt.figure(figsize=(6, 3))
-plt.plot(time, filtered_signal)
+plt.plot(stages['t'], filtered_signal)
 
 # Labels and Title
 plt.xlabel('Time (s)')
@@ -1,15 +1,30 @@
 import numpy as np
 import pandas as pd
 import scipy.signal as signal
+import os
 import time
 from pathlib import Path
 
+from adaptive_scheduler import AdaptiveScheduler, motion_level, signal_quality
+from alert_engine import AlertEngine, open_gpio_notifier, print_notifier
+from sample_journal import JOURNAL_FILE, SAMPLE_DTYPE, read_journal
+from shm_ring import SampleRing
+from uplink import UPLINK_HOST, UplinkClient, uplink_notifier
+
 # 📌 Folder containing CSV files
 folder_path = "./"
 file_x = folder_path + "x-axis.csv"
 file_y = folder_path + "y-axis.csv"
 file_z = folder_path + "z-axis.csv"
 
+# 📌 Shared-memory ring published by the sampler (attached on first read)
+ring = None
+ring_seq = None      # write_seq at the last read
+ring_seq_at = None   # time.monotonic() when write_seq last advanced
+
+# Seconds without new ring records before checking for a restarted sampler
+RING_STALE_AFTER = 3.0
+
 # 📌 Chebyshev Type II Low-Pass Filter
 def chebyshev_filter(signal_data, fs=50, cutoff=0.5, order=4, rs=40):
     nyquist = 0.5 * fs
@@ -17,81 +32,190 @@ def chebyshev_filter(signal_data, fs=50, cutoff=0.5, order=4, rs=40):
     sos = signal.cheby2(order, rs, normal_cutoff, btype='low', analog=False, output='sos')
     return signal.sosfiltfilt(sos, signal_data)
 
+# 📌 A peak only counts as a breath if its prominence clears this many times the sensor
+# noise level. Low-passed noise alone (a still sensor) peaks below ~0.7x.
+BREATH_PROMINENCE = 1.0
+
+# 📌 Sensor noise std of raw windows (along the last axis), robust to breathing and motion:
+# the median absolute sample-to-sample difference, scaled to a Gaussian std
+def noise_level(raw_signal):
+    diff = np.diff(raw_signal, axis=-1)
+    mad = np.median(np.abs(diff - np.median(diff, axis=-1, keepdims=True)), axis=-1)
+    return 1.4826 * mad / np.sqrt(2)
+
 # 📌 Detect Breathing Rate (BPM) using Peak Detection
-def detect_breathing_rate(filtered_signal, fs=50):
-    peaks, _ = signal.find_peaks(filtered_signal, height=0, distance=fs*2)  # At least 2s apart
+# noise_std is the window's noise_level(); 0 disables the prominence gate
+def detect_breathing_rate(filtered_signal, fs=50, peak_distance=2, noise_std=0.0, prominence=BREATH_PROMINENCE):
+    peaks, _ = signal.find_peaks(filtered_signal, height=0, distance=fs*peak_distance,  # At least 2s apart by default
+                                 prominence=prominence * noise_std)
     duration_in_minutes = len(filtered_signal) / (fs * 60)
     if duration_in_minutes == 0:
         return 0, peaks  # Prevent division by zero
     breathing_rate = len(peaks) / duration_in_minutes  # BPM formula
     return breathing_rate, peaks
 
-# 📌 Detect Respiratory Depression (BPM < 10 or apnea > 15s)
-def detect_respiratory_depression(filtered_signal, fs=50):
-    bpm, peaks = detect_breathing_rate(filtered_signal, fs)
-    apnea_detected = False
-    if len(peaks) > 1:
-        peak_intervals = np.diff(peaks) / fs  # Convert to seconds
-        if np.any(peak_intervals > 15):
-            apnea_detected = True
-
-    # 🚨 Alerts
-    if bpm < 10:
-        print("⚠️ Bradypnea Detected: BPM =", bpm)
-    if apnea_detected:
-        print("🚨 Apnea Detected: No breath for > 15 sec!")
-
-    return bpm, apnea_detected
+# 📌 Determine dominant axis (max peak-to-peak motion)
+def select_dominant_axis(x, y, z):
+    p2p_x, p2p_y, p2p_z = np.ptp(x), np.ptp(y), np.ptp(z)
+    return x if p2p_x > p2p_y and p2p_x > p2p_z else (y if p2p_y > p2p_x and p2p_y > p2p_z else z)
+
+# 📌 Vectorized select_dominant_axis() over a stack of windows (or sensors)
+# windows has shape (3, n_windows, n_samples); returns (n_windows, n_samples)
+def dominant_rows(windows):
+    px, py, pz = np.ptp(windows, axis=2)
+    choice = np.where((px > py) & (px > pz), 0, np.where((py > px) & (py > pz), 1, 2))
+    return windows[choice, np.arange(windows.shape[1])]
+
+# 📌 Read the newest samples: shared-memory ring, then journal, then legacy CSV files
+# Returns a (t, x, y, z) structured array and the wall-clock time the newest sample was acquired
+def read_samples(samples_to_read):
+    global ring, ring_seq, ring_seq_at
+    if ring is None or time.monotonic() - ring_seq_at > RING_STALE_AFTER:
+        # A restarted sampler replaces the segment, leaving our mapping orphaned
+        try:
+            new_ring = SampleRing.attach()
+        except (FileNotFoundError, ValueError):
+            new_ring = None
+        if new_ring is not None and (ring is None or new_ring.t0 != ring.t0):
+            if ring is not None:
+                print("🔄 Sampler restarted, re-attached to its new ring")
+                ring.close()
+            ring, ring_seq, ring_seq_at = new_ring, None, time.monotonic()
+        else:
+            if new_ring is not None:
+                new_ring.close()
+            if ring is not None:
+                print(f"⚠️ No new samples for {time.monotonic() - ring_seq_at:.0f} s, data is stale (sampler stopped?)")
+
+    if ring is not None:
+        while True:
+            view, start = ring.latest(samples_to_read)
+            samples = view.copy()  # The only copy out of shared memory; valid if not lapped meanwhile
+            if ring.is_valid(start):
+                break
+            print("⚠️ Sampler overran the window while reading, retrying...")
+        if ring.write_seq != ring_seq:
+            ring_seq, ring_seq_at = ring.write_seq, time.monotonic()
+        acquired_at = ring.t0 + samples['t'][-1] if len(samples) else time.time()
+        return samples, acquired_at
+
+    if os.path.exists(JOURNAL_FILE):
+        # Journal timestamps are wall-clock acquisition times
+        samples = read_journal(JOURNAL_FILE, last=samples_to_read)
+        return samples, samples['t'][-1] if len(samples) else os.path.getmtime(JOURNAL_FILE)
+
+    df_x = pd.read_csv(file_x, header=None, names=['X', 'Time'])
+    df_y = pd.read_csv(file_y, header=None, names=['Y', 'Time'])
+    df_z = pd.read_csv(file_z, header=None, names=['Z', 'Time'])
+    n = min(len(df_x), len(df_y), len(df_z))
+    samples = np.empty(n, dtype=SAMPLE_DTYPE)
+    samples['t'] = df_x['Time'].to_numpy(dtype=float)[:n]
+    samples['x'] = df_x['X'].to_numpy(dtype=float)[:n]
+    samples['y'] = df_y['Y'].to_numpy(dtype=float)[:n]
+    samples['z'] = df_z['Z'].to_numpy(dtype=float)[:n]
+    return samples, os.path.getmtime(file_z)
+
+# 📌 Resample the newest window_size seconds of one axis onto a uniform grid
+def resample_window(samples, axis, grid):
+    t = samples['t']
+    values = np.nan_to_num(samples[axis], nan=0.0)
+    valid = ~np.isnan(t)
+    return np.interp(grid, t[valid], values[valid])
 
 # 📌 Live Monitoring Function
-def monitor_breathing(fs=50, window_size=10):
-    samples_to_read = fs * window_size  # Read last 20 seconds of data
+# With a scheduler, fs and the update interval follow its current rate level
+def monitor_breathing(fs=50, window_size=10, engine=None, scheduler=None):
+    # Read twice the nominal window so a slower-than-requested sampler still fills it
+    max_fs = scheduler.max_fs if scheduler is not None else fs
+    samples_to_read = int(2 * max_fs * window_size)
+    interval = 1
+
+    # 📌 Alerts are raised/cleared once per episode instead of every tick
+    if engine is None:
+        engine = AlertEngine(notifiers=[print_notifier])
 
     while True:
         try:
-            # 📌 Read CSV files
-            df_x = pd.read_csv(file_x, header=None, names=['X', 'Time'])
-            df_y = pd.read_csv(file_y, header=None, names=['Y', 'Time'])
-            df_z = pd.read_csv(file_z, header=None, names=['Z', 'Time'])
+            if scheduler is not None:
+                fs, interval = scheduler.fs, scheduler.analysis_interval
+
+            # 📌 Read newest samples
+            samples, acquired_at = read_samples(samples_to_read)
 
-            if len(df_x) < samples_to_read:
+            if len(samples) < 2 or np.nanmax(samples['t']) - np.nanmin(samples['t']) < window_size:
                 print("⚠️ Not enough data yet...")
                 time.sleep(1)
                 continue
 
-            # 📌 Extract recent data
-            time_data = df_x['Time'].iloc[-samples_to_read:]
-            x = df_x['X'].iloc[-samples_to_read:]
-            y = df_y['Y'].iloc[-samples_to_read:]
-            z = df_z['Z'].iloc[-samples_to_read:]
+            # 📌 Extract the last window_size seconds at a uniform fs
+            time_end = np.nanmax(samples['t'])
+            time_data = np.arange(time_end - window_size, time_end, 1 / fs)
+            x = resample_window(samples, 'x', time_data)
+            y = resample_window(samples, 'y', time_data)
+            z = resample_window(samples, 'z', time_data)
 
             # 📌 Determine dominant axis
-            p2p_x, p2p_y, p2p_z = np.ptp(x), np.ptp(y), np.ptp(z)
-            dominant_signal = x if p2p_x > p2p_y and p2p_x > p2p_z else (y if p2p_y > p2p_x and p2p_y > p2p_z else z)
+            dominant_signal = select_dominant_axis(x, y, z)
 
             # 📌 Skip first N values (remove noisy startup data)
             N = 3
             dominant_signal = dominant_signal[N:]
             time_data = time_data[N:]
 
-            # 📌 Replace NaN values with 0
-            dominant_signal = np.nan_to_num(dominant_signal, nan=0.0)
-
             # 📌 Apply Filtering
             filtered_signal = chebyshev_filter(dominant_signal, fs=fs)
 
-            # 📌 Compute BPM & detect apnea
-            bpm, apnea_detected = detect_respiratory_depression(filtered_signal, fs)
+            # 📌 Compute BPM & time of the newest breath
+            bpm, peaks = detect_breathing_rate(filtered_signal, fs, noise_std=noise_level(dominant_signal))
+            last_breath = time_data[peaks[-1]] if len(peaks) else None
+
+            # 📌 Update alert state
+            engine.update(time_data[-1], bpm, last_breath, acquired_at=acquired_at)
 
             # 📌 Print results
-            print(f"🫁 Respiratory Rate: {bpm:.2f} BPM  {'🚨 Apnea Detected!' if apnea_detected else ''}")
+            print(f"🫁 Respiratory Rate: {bpm:.2f} BPM  {'🚨 Apnea Detected!' if engine.active('apnea') else ''}")
 
-            # 📌 Wait for 1 second before next update
-            time.sleep(1)
+            # 📌 Pick the next sample rate and ask the sampler to follow it
+            if scheduler is not None:
+                scheduler.update(bpm, time_data[-1] - engine.last_breath,
+                                 signal_quality(peaks, fs), motion_level(dominant_signal, filtered_signal))
+                if ring is not None:
+                    ring.sample_period = scheduler.sample_period
+
+            # 📌 Wait before next update (1 s, or the scheduler's interval)
+            time.sleep(interval)
 
         except Exception as e:
             print("Error:", e)
             break
 
+# 📌 Alert outputs shared by the single- and multi-site monitors
+# Returns the notifiers and the started uplink client (None unless UPLINK_HOST is set)
+def default_notifiers():
+    notifiers = [print_notifier]
+
+    # 📌 Drive the buzzer, LED and LCD when running on the Pi
+    # (this process then owns those pins: don't run sensor-main.py / timer-main.py alongside)
+    gpio = open_gpio_notifier()
+    if gpio is not None:
+        notifiers.append(gpio)
+
+    # 📌 Forward alerts to the central collector when UPLINK_HOST is set
+    uplink = UplinkClient().start() if UPLINK_HOST else None
+    if uplink is not None:
+        notifiers.append(uplink_notifier(uplink))
+    return notifiers, uplink
+
 # 📌 Run real-time breathing monitor
-monitor_breathing()
+if __name__ == "__main__":
+    scheduler = AdaptiveScheduler()
+    notifiers, uplink = default_notifiers()
+    engine = AlertEngine(notifiers=notifiers)
+    try:
+        monitor_breathing(engine=engine, scheduler=scheduler)
+    except KeyboardInterrupt:
+        print("Alert latency:", engine.latency_report())
+        print("Analysis cost:", scheduler.report())
+        if uplink is not None:
+            uplink.close()
+            print("Uplink:", uplink.stats())
@@ -0,0 +1,165 @@
+import argparse
+import time
+
+import numpy as np
+
+from adaptive_scheduler import MOTION_THRESHOLD, motion_level, signal_quality
+from alert_engine import AlertEngine, print_notifier
+from fixed_rate_sampler import FixedRateSampler
+from live_respiratory_depression import (chebyshev_filter, default_notifiers, detect_breathing_rate, dominant_rows,
+                                         noise_level)
+from sample_journal import SampleJournal, read_journal
+
+# 📌 One BNO055 per site on the shared bit-banged bus (ADR pin high selects 0x29)
+SITES = [
+    ("chest", 0x28),
+    ("shoulder", 0x29),
+]
+SCL_PIN = 8
+SDA_PIN = 7
+
+MULTI_JOURNAL_FILE = "./samples-multi.journal"
+
+# BPM difference within which sites are treated as seeing the same breathing
+AGREE_BPM = 2
+
+def site_dtype(sites=SITES):
+    """ One record per schedule slot: shared timestamp plus x/y/z per site. """
+    return np.dtype([("t", "<f8")] + [(f"{site}_{axis}", "<f4") for site, _ in sites for axis in "xyz"])
+
+def open_sensors(sites=SITES, scl_pin=SCL_PIN, sda_pin=SDA_PIN):
+    """ Open every site's BNO055 on one bit-banged I2C bus. """
+    import adafruit_bno055
+    import adafruit_bitbangio as bitbangio
+    from adafruit_blinka.microcontroller.bcm283x.pin import Pin
+
+    i2c = bitbangio.I2C(Pin(scl_pin), Pin(sda_pin))
+    return [adafruit_bno055.BNO055_I2C(i2c, address=address) for _, address in sites]
+
+def sample_sites(sensors, journal, sampler):
+    """
+    Read every sensor in each schedule slot and append one multi-channel record.
+
+    Records carry wall-clock time (start time plus slot time), as in i2c_test.py.
+    """
+    start_time = time.time()
+    for t in sampler:
+        values = []
+        for sensor in sensors:
+            values.extend(sensor.linear_acceleration)
+        journal.append(start_time + t, *values)
+
+def site_windows(samples, sites=SITES, fs=50, window_size=10):
+    """
+    Resample the newest window_size seconds of every site onto one grid.
+
+    Returns:
+        grid (array): Shared timestamps.
+        axes (array): Shape (n_sites, 3, n_samples).
+    """
+    t = samples["t"]
+    grid = np.arange(t[-1] - window_size, t[-1], 1 / fs)
+    axes = np.array([
+        [np.interp(grid, t, np.nan_to_num(samples[f"{site}_{axis}"], nan=0.0)) for axis in "xyz"]
+        for site, _ in sites
+    ])
+    return grid, axes
+
+def analyze_sites(grid, axes, sites=SITES, fs=50, skip=3):
+    """
+    Per-site breathing analysis as one batch.
+
+    Dominant-axis selection and the Chebyshev filter run once over the
+    (n_sites, n_samples) array; only peak picking loops over sites.
+    """
+    dominant = dominant_rows(axes.transpose(1, 0, 2))[:, skip:]
+    filtered = chebyshev_filter(dominant, fs=fs)
+    grid = grid[skip:]
+
+    results = []
+    for (site, _), raw, site_filtered in zip(sites, dominant, filtered):
+        bpm, peaks = detect_breathing_rate(site_filtered, fs, noise_std=noise_level(raw))
+        results.append({
+            "site": site,
+            "bpm": bpm,
+            "last_breath": grid[peaks[-1]] if len(peaks) else None,
+            "quality": signal_quality(peaks, fs),
+            "motion": motion_level(raw, site_filtered),
+            "amplitude": float(np.ptp(site_filtered)),
+        })
+    return results
+
+def combine_sites(results, agree_bpm=AGREE_BPM):
+    """
+    Pick or fuse the best site.
+
+    Sites with too much motion are dropped unless all of them move. The best
+    remaining site is the most regular one, then the strongest. If other sites
+    agree with it within agree_bpm, their BPM is averaged (weighted by
+    amplitude) and the newest breath across them is used.
+    """
+    candidates = [r for r in results if r["motion"] <= MOTION_THRESHOLD] or results
+    best = max(candidates, key=lambda r: (r["quality"] or 0.0, r["amplitude"]))
+    agreeing = [r for r in candidates if abs(r["bpm"] - best["bpm"]) <= agree_bpm]
+
+    weights = np.array([r["amplitude"] for r in agreeing]) + 1e-12
+    breaths = [r["last_breath"] for r in agreeing if r["last_breath"] is not None]
+    return {
+        "site": "+".join(r["site"] for r in agreeing),
+        "bpm": float(np.average([r["bpm"] for r in agreeing], weights=weights)),
+        "last_breath": max(breaths) if breaths else None,
+    }
+
+def monitor_sites(sites=SITES, fs=50, window_size=10, engine=None):
+    """ Live monitor over the multi-site journal, alerting on the combined site. """
+    dtype = site_dtype(sites)
+    if engine is None:
+        engine = AlertEngine(notifiers=[print_notifier])
+
+    while True:
+        try:
+            samples = read_journal(MULTI_JOURNAL_FILE, last=2 * fs * window_size, dtype=dtype)
+            if len(samples) < 2 or samples["t"][-1] - samples["t"][0] < window_size:
+                print("⚠️ Not enough data yet...")
+                time.sleep(1)
+                continue
+
+            grid, axes = site_windows(samples, sites, fs, window_size)
+            results = analyze_sites(grid, axes, sites, fs)
+            combined = combine_sites(results)
+            engine.update(grid[-1], combined["bpm"], combined["last_breath"], acquired_at=samples["t"][-1])
+
+            per_site = "  ".join(f"{r['site']} {r['bpm']:.1f}" for r in results)
+            print(f"🫁 Respiratory Rate: {combined['bpm']:.2f} BPM via {combined['site']}  ({per_site})  "
+                  f"{'🚨 Apnea Detected!' if engine.active('apnea') else ''}")
+            time.sleep(1)
+
+        except Exception as e:
+            print("Error:", e)
+            break
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sample or monitor several IMUs on one schedule.")
+    parser.add_argument("mode", choices=["sample", "monitor"])
+    parser.add_argument("--fs", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.mode == "monitor":
+        notifiers, uplink = default_notifiers()
+        engine = AlertEngine(notifiers=notifiers)
+        try:
+            monitor_sites(fs=args.fs, engine=engine)
+        except KeyboardInterrupt:
+            print("Alert latency:", engine.latency_report())
+            if uplink is not None:
+                uplink.close()
+                print("Uplink:", uplink.stats())
+    else:
+        journal = SampleJournal(MULTI_JOURNAL_FILE, dtype=site_dtype())
+        sampler = FixedRateSampler(1.0 / args.fs)
+        try:
+            sample_sites(open_sensors(), journal, sampler)
+        except KeyboardInterrupt:
+            journal.close()
+            print("Journal:", journal.stats())
+            print("Sampling jitter:", sampler.stats())
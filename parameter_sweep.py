@@ -0,0 +1,210 @@
+import argparse
+import itertools
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import scipy.signal as signal
+
+from evaluate_detection import (DEFAULT_PARAMS, MANIFEST_FILE, alert_ticks, detect_on_filtered,
+                                detector_tick, last_breath_time, load_manifest, resample_uniform,
+                                score_ticks, summarize, tick_ends, trial_recording)
+from live_respiratory_depression import dominant_rows, noise_level
+
+# 📌 Tuning knobs to sweep (filter settings first, peak-detector settings last)
+SWEEP_GRID = {
+    "window_size": [10, 15],
+    "skip": [3],
+    "cutoff": [0.3, 0.5, 0.7],
+    "order": [2, 4, 6],
+    "rs": [20, 40],
+    "peak_distance": [1.5, 2, 3],
+    "prominence": [0.5, 1.0, 2.0],
+}
+FILTER_KEYS = ("window_size", "skip", "cutoff", "order", "rs")
+
+# Recordings resampled to the sweep's fs, set once per worker process
+_recordings = []
+
+def _init_worker(recordings):
+    global _recordings
+    _recordings = recordings
+
+def load_recordings(manifest_file=MANIFEST_FILE, fs=DEFAULT_PARAMS["fs"]):
+    """ Load and resample every labelled trial once for the whole sweep. """
+    recordings = []
+    for trial in load_manifest(manifest_file):
+        t, x, y, z = trial_recording(trial)
+        axes = np.vstack([resample_uniform(t, axis, fs)[1] for axis in (x, y, z)])
+        recordings.append((trial, float(np.nanmax(t) - np.nanmin(t)), axes))
+    return recordings
+
+@lru_cache(maxsize=None)
+def _window_stack(window_size, skip, fs):
+    """ Every live-monitor window of every recording, stacked row-wise. """
+    params = {"fs": fs, "window_size": window_size, "tick": DEFAULT_PARAMS["tick"]}
+    samples_to_read = int(fs * window_size)
+    rows, index = [], []
+    for i, (_, _, axes) in enumerate(_recordings):
+        ends = list(tick_ends(axes.shape[1], params))
+        if not ends:
+            continue
+        windows = np.stack([axes[:, end - samples_to_read:end] for end in ends], axis=1)
+        rows.append(dominant_rows(windows)[:, skip:])
+        index.extend((i, end) for end in ends)
+    return (np.vstack(rows) if rows else np.empty((0, samples_to_read - skip))), index
+
+@lru_cache(maxsize=None)
+def _filtered(window_size, skip, cutoff, order, rs, fs):
+    """
+    Filter every window and every full recording for one filter setting.
+
+    All windows share a length, so they go through a single sosfiltfilt call
+    along the last axis. Each filtered signal comes with its raw signal's
+    noise_level() for the breath prominence gate. Results are memoized so
+    every peak-detector setting sharing this filter reuses them.
+    """
+    sos = signal.cheby2(order, rs, cutoff / (0.5 * fs), btype='low', analog=False, output='sos')
+    stack, index = _window_stack(window_size, skip, fs)
+    filtered_windows = signal.sosfiltfilt(sos, stack, axis=-1) if len(stack) else stack
+    window_noise = noise_level(stack) if len(stack) else np.zeros(0)
+
+    filtered_full = []
+    for _, _, axes in _recordings:
+        dominant = dominant_rows(axes[:, None, :])[0, skip:]
+        filtered = signal.sosfiltfilt(sos, dominant)
+        filtered_full.append((filtered, noise_level(dominant)))
+    return filtered_windows, window_noise, index, filtered_full
+
+def tick_cost(params, recordings, repeats=20):
+    """
+    Best-of-N wall time (s) of one live detector tick with these settings.
+
+    Run serially in the parent process so the timing is not skewed by other
+    workers competing for the CPU.
+    """
+    _, _, axes = max(recordings, key=lambda rec: rec[2].shape[1])
+    n = int(params["fs"] * params["window_size"])
+    x, y, z = (np.resize(axis, n) for axis in axes)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        detector_tick(x, y, z, params)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def motion_levels(recordings, params=DEFAULT_PARAMS):
+    """
+    motion_level() of every live-monitor window, as the scheduler sees it.
+
+    The labelled trials are quiet breathing, so MOTION_THRESHOLD in
+    adaptive_scheduler.py should sit above most of these.
+    """
+    _init_worker(recordings)
+    stack, _ = _window_stack(params["window_size"], params["skip"], params["fs"])
+    filtered_windows, _, _, _ = _filtered(*(params[key] for key in FILTER_KEYS), params["fs"])
+    return np.sqrt(np.mean((stack - filtered_windows) ** 2, axis=-1))
+
+def evaluate_group(filter_setting, peak_settings):
+    """ Score every peak-detector setting that shares one filter setting. """
+    rows = []
+    for peak_setting in peak_settings:
+        params = {**DEFAULT_PARAMS, **filter_setting, **peak_setting}
+        filtered_windows, window_noise, index, filtered_full = _filtered(
+            *(params[key] for key in FILTER_KEYS), params["fs"])
+
+        raw_ticks = [[] for _ in _recordings]
+        for (i, end), window, noise in zip(index, filtered_windows, window_noise):
+            bpm, peaks = detect_on_filtered(window, params, noise)
+            raw_ticks[i].append(((end - 1) / params["fs"], float(bpm), last_breath_time(peaks, end, params)))
+
+        results = []
+        for (trial, duration, _), rec_ticks, (full, noise) in zip(_recordings, raw_ticks, filtered_full):
+            breaths = len(detect_on_filtered(full, params, noise)[1])
+            results.append(score_ticks(trial, duration, breaths, alert_ticks(rec_ticks, params), params))
+
+        rows.append({**filter_setting, **peak_setting, **summarize(results)})
+    return rows
+
+def parameter_sets(grid=SWEEP_GRID, samples=None, seed=0):
+    """ Full grid, or a random sample of it when samples is given. """
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+    if samples is not None and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return combos
+
+def pareto_front(table, accuracy="bpm_mae", cost="tick_cost_ms", constraint="missed_apnea"):
+    """
+    Flag rows that no cheaper row beats on accuracy.
+
+    Missing an apnea is a hard constraint: only rows with the fewest missed
+    apneas in the table (0 whenever any setting catches them all) can be on
+    the front.
+    """
+    table = table.sort_values([cost, accuracy]).reset_index(drop=True)
+    allowed = table[constraint] == table[constraint].min()
+    best = float("inf")
+    front = []
+    for value, ok in zip(table[accuracy], allowed):
+        on_front = ok and value is not None and not pd.isna(value) and value < best
+        best = value if on_front else best
+        front.append(on_front)
+    table["pareto"] = front
+    return table
+
+def sweep(manifest_file=MANIFEST_FILE, grid=SWEEP_GRID, samples=None, workers=None, seed=0):
+    """
+    Evaluate a grid or random search of settings across processes.
+
+    Accuracy is scored in parallel; per-tick cost is then timed once per
+    filter setting (the peak-detector settings barely affect it) and joined
+    onto every row sharing that setting.
+    """
+    recordings = load_recordings(manifest_file)
+
+    groups = {}
+    for combo in parameter_sets(grid, samples, seed):
+        filter_setting = tuple((key, combo[key]) for key in FILTER_KEYS if key in combo)
+        peak_setting = {key: value for key, value in combo.items() if key not in FILTER_KEYS}
+        groups.setdefault(filter_setting, []).append(peak_setting)
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(recordings,)) as pool:
+        futures = [pool.submit(evaluate_group, dict(key), peaks) for key, peaks in groups.items()]
+        for future in futures:
+            rows.extend(future.result())
+
+    costs = {key: tick_cost({**DEFAULT_PARAMS, **dict(key)}, recordings) * 1000 for key in groups}
+    for row in rows:
+        row["tick_cost_ms"] = costs[tuple((key, row[key]) for key in FILTER_KEYS if key in row)]
+    return pareto_front(pd.DataFrame(rows))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep filter and peak-detector settings over the labelled recordings.")
+    parser.add_argument("--manifest", default=MANIFEST_FILE)
+    parser.add_argument("--random", type=int, default=None, help="Evaluate N random settings instead of the full grid")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", default=None, help="Also write the full table to this CSV file")
+    parser.add_argument("--motion", action="store_true",
+                        help="Print motion_level() percentiles of the labelled windows instead (MOTION_THRESHOLD)")
+    args = parser.parse_args()
+
+    if args.motion:
+        levels = motion_levels(load_recordings(args.manifest))
+        for q in (50, 75, 80, 90, 95):
+            print(f"p{q} motion: {np.percentile(levels, q):.3f} m/s²")
+        raise SystemExit
+
+    table = sweep(args.manifest, samples=args.random, workers=args.workers, seed=args.seed)
+    if args.csv:
+        table.to_csv(args.csv, index=False)
+
+    columns = list(SWEEP_GRID) + ["breath_mae", "bpm_mae", "missed_apnea", "false_apnea", "tick_cost_ms"]
+    print("📌 Pareto front (accuracy vs per-tick compute cost, fewest missed apneas only):")
+    print(table[table["pareto"]][columns].to_string(index=False))
@@ -0,0 +1,233 @@
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+# 📌 Journal file used by the sampler and the live monitor
+JOURNAL_FILE = "./samples.journal"
+
+# One record per BNO055 reading: wall-clock timestamp (s since the epoch, so runs
+# appended to the same journal stay in order) plus linear acceleration per axis
+SAMPLE_DTYPE = np.dtype([("t", "<f8"), ("x", "<f4"), ("y", "<f4"), ("z", "<f4")])
+
+# Block header: magic, sequence number, sample count, CRC32 of the payload
+BLOCK_MAGIC = b"SJ01"
+BLOCK_HEADER = struct.Struct("<4sIII")
+
+PAGE_SIZE = 4096  # Smallest unit the SD card controller rewrites on a flush
+
+# Block offsets already walked per journal path, so tailing only reads new headers
+_block_index = {}
+
+def scan_blocks(f, dtype=SAMPLE_DTYPE, verify=True, offset=0):
+    """
+    Walk the blocks of a journal file of `dtype` records.
+
+    Stops at the first torn or corrupt block. With verify=False only the
+    headers are read and payloads are seeked past, so a block is only known
+    to be complete, not intact; check it with read_block() before use.
+
+    Yields:
+        (offset, seq, count): File offset of the block header, its sequence
+        number and number of samples.
+    """
+    size = os.fstat(f.fileno()).st_size
+    while offset + BLOCK_HEADER.size <= size:
+        f.seek(offset)
+        magic, seq, count, crc = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+        end = offset + BLOCK_HEADER.size + count * dtype.itemsize
+        if magic != BLOCK_MAGIC or end > size:
+            return
+        if verify and zlib.crc32(f.read(count * dtype.itemsize)) != crc:
+            return
+        yield offset, seq, count
+        offset = end
+
+def read_block(f, offset, dtype=SAMPLE_DTYPE):
+    """ Records of the block at offset, or None if its payload fails the CRC. """
+    f.seek(offset)
+    _, _, count, crc = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+    payload = f.read(count * dtype.itemsize)
+    if len(payload) != count * dtype.itemsize or zlib.crc32(payload) != crc:
+        return None
+    return np.frombuffer(payload, dtype=dtype)
+
+def recover(path, dtype=SAMPLE_DTYPE):
+    """
+    Truncate a journal to its last good block.
+
+    Returns:
+        (samples, next_seq, dropped_bytes)
+    """
+    if not os.path.exists(path):
+        return 0, 0, 0
+    samples, next_seq, end = 0, 0, 0
+    with open(path, "r+b") as f:
+        for offset, seq, count in scan_blocks(f, dtype):
+            samples += count
+            next_seq = seq + 1
+            end = offset + BLOCK_HEADER.size + count * dtype.itemsize
+        size = f.seek(0, os.SEEK_END)
+        if size > end:
+            f.truncate(end)
+            f.flush()
+            os.fsync(f.fileno())
+    return samples, next_seq, size - end
+
+def _indexed_blocks(f, path, dtype):
+    """ Header-only block list of an open journal, extending the cached index. """
+    st = os.fstat(f.fileno())
+    key = (path, dtype)
+    inode, blocks, end = _block_index.get(key, (None, [], 0))
+    if inode != st.st_ino or st.st_size < end:
+        blocks, end = [], 0  # Replaced or truncated (recovered): walk from the start
+    for block in scan_blocks(f, dtype, verify=False, offset=end):
+        blocks.append(block)
+        end = block[0] + BLOCK_HEADER.size + block[2] * dtype.itemsize
+    _block_index[key] = (st.st_ino, blocks, end)
+    return blocks
+
+def read_journal(path=JOURNAL_FILE, last=None, dtype=SAMPLE_DTYPE):
+    """
+    Read samples from every intact block of a journal.
+
+    Parameters:
+        last (int): Only return the newest `last` samples. Block headers are
+            indexed once per process and only new ones are read on later
+            calls; only the blocks returned are read and CRC-checked, so
+            tailing a long journal stays cheap. recover() does the full check.
+
+    Returns:
+        array: Structured array of `dtype` records (fields t, x, y, z by default).
+    """
+    with open(path, "rb") as f:
+        blocks = _indexed_blocks(f, path, dtype)
+        chunks, total = [], 0
+        for offset, _, count in reversed(blocks):
+            if last is not None and total >= last:
+                break
+            records = read_block(f, offset, dtype)
+            if records is None:
+                # Corrupt block: like a full scan, drop it and everything after it
+                chunks, total = [], 0
+                continue
+            chunks.append(records)
+            total += count
+    samples = np.concatenate(chunks[::-1]) if chunks else np.empty(0, dtype=dtype)
+    return samples[max(len(samples) - last, 0):] if last is not None else samples
+
+def export_csv(path=JOURNAL_FILE, folder_path="./"):
+    """ Write a journal out as the legacy x/y/z-axis.csv files. """
+    samples = read_journal(path)
+    for axis in "xyz":
+        np.savetxt(os.path.join(folder_path, f"{axis}-axis.csv"),
+                   np.column_stack([samples[axis], samples["t"]]), delimiter=",", fmt="%.6g")
+
+class SampleJournal:
+    """
+    Append-only, checksummed sample log for the SD card.
+
+    Samples are buffered and written as one CRC-protected block every
+    block_size samples, and the file is fsynced at most every fsync_interval
+    seconds. A power cut loses at most the unwritten block plus one fsync
+    interval; on reopen the journal is truncated back to its last good block.
+
+    Parameters:
+        path (str): Journal file.
+        block_size (int): Samples per block.
+        fsync_interval (float): Seconds between fsyncs.
+        dtype: Record layout; readers must pass the same dtype.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, block_size=64, fsync_interval=5.0, clock=time.monotonic,
+                 dtype=SAMPLE_DTYPE):
+        self.path = path
+        self.dtype = dtype
+        self.block_size = block_size
+        self.fsync_interval = fsync_interval
+        self.clock = clock
+
+        self.recovered_samples, self.seq, self.dropped_bytes = recover(path, dtype)
+        if self.dropped_bytes:
+            print(f"⚠️ Journal recovered: dropped {self.dropped_bytes} bytes of torn data")
+
+        self.f = open(path, "ab")
+        self.pending = np.empty(block_size, dtype=dtype)
+        self.n_pending = 0
+        self.last_fsync = self.clock()
+        self.unsynced_bytes = 0
+
+        # Write accounting
+        self.samples = 0
+        self.blocks = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+        self.device_bytes = 0
+
+    def append(self, t, *values):
+        """ Buffer one record (t, x, y, z, ...); missing (None) readings are stored as NaN. """
+        self.pending[self.n_pending] = (t, *(np.nan if v is None else v for v in values))
+        self.n_pending += 1
+        self.samples += 1
+        if self.n_pending == self.block_size:
+            self.flush()
+        if self.clock() - self.last_fsync >= self.fsync_interval:
+            self.sync()
+
+    def flush(self):
+        """ Write buffered samples as one block (not yet durable until sync()). """
+        if not self.n_pending:
+            return
+        payload = self.pending[:self.n_pending].tobytes()
+        self.f.write(BLOCK_HEADER.pack(BLOCK_MAGIC, self.seq, self.n_pending, zlib.crc32(payload)))
+        self.f.write(payload)
+        written = BLOCK_HEADER.size + len(payload)
+        self.seq += 1
+        self.blocks += 1
+        self.bytes_written += written
+        self.unsynced_bytes += written
+        self.n_pending = 0
+        # Hand the block to the OS so tailing readers see it now; durability still waits for sync()
+        self.f.flush()
+
+    def sync(self):
+        """ Make everything written so far durable. """
+        self.f.flush()
+        if self.unsynced_bytes:
+            os.fsync(self.f.fileno())
+            self.fsyncs += 1
+            # Each fsync rewrites at least every page it touches
+            self.device_bytes += -(-self.unsynced_bytes // PAGE_SIZE) * PAGE_SIZE
+            self.unsynced_bytes = 0
+        self.last_fsync = self.clock()
+
+    def close(self):
+        self.flush()
+        self.sync()
+        self.f.close()
+
+    def stats(self):
+        """
+        Write accounting since the journal was opened.
+
+        write_amplification is estimated device bytes per byte of sample data.
+        csv_writes is how many separate appends save_to_csv() would have made.
+        """
+        payload_bytes = self.samples * self.dtype.itemsize
+        return {
+            "samples": self.samples,
+            "blocks": self.blocks,
+            "bytes_written": self.bytes_written,
+            "fsyncs": self.fsyncs,
+            "device_bytes": self.device_bytes,
+            "write_amplification": self.device_bytes / payload_bytes if payload_bytes else 0.0,
+            "csv_writes": self.samples * (len(self.dtype.names) - 1),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
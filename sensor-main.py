@@ -5,6 +5,8 @@ import board
 import digitalio
 import adafruit_character_lcd.character_lcd as character_lcd
 
+from uplink import UPLINK_HOST, UplinkClient
+
 GPIO.setmode(GPIO.BCM)
 
 
@@ -51,6 +53,9 @@ GPIO.setup(GREEN_LIGHT_PIN, GPIO.OUT)
 # Initialize the LCD
 lcd = character_lcd.Character_LCD_Mono(lcd_rs, lcd_en, lcd_d4, lcd_d5, lcd_d6, lcd_d7, lcd_columns, lcd_rows)
 
+# PANIC alerts go to the central collector on the uplink's priority lane
+uplink = UplinkClient().start() if UPLINK_HOST else None
+
 def status_good():
 	GPIO.output(GREEN_LIGHT_PIN, GPIO.HIGH)
 
@@ -70,6 +75,8 @@ def reminder():
 
 def panic():
 	print("!!! Sending PANIC alert !!!")
+	if uplink is not None:
+		uplink.send_alert("panic", "raised")
 	GPIO.output(GREEN_LIGHT_PIN, GPIO.LOW)   
 	GPIO.output(BUZZER_PIN, GPIO.HIGH)
 	print_msg("!! PANIC !! \n") 
@@ -82,6 +89,8 @@ def panic():
 
 		if not GPIO.input(SAFE_BUTTON_PIN):
 			print("Canceling PANIC request")
+			if uplink is not None:
+				uplink.send_alert("panic", "cleared")
 			print_msg("Reversed \n PANIC CALL")
 			break
     	
@@ -97,8 +106,8 @@ try:
 		
 		print("Box Opened....")
 
-		start_time = time.time()
-		current_time = time.time()
+		start_time = time.monotonic()
+		current_time = time.monotonic()
 
 		status_good()
 
@@ -113,8 +122,8 @@ try:
 			if (current_time-start_time) > TIMER_BUZZ_INTERVAL:
 				print("in buzzer interval")
 				
-				start_time = time.time()
-				current_time = time.time()
+				start_time = time.monotonic()
+				current_time = time.monotonic()
 				while (current_time-start_time) < TIMER_PANIC:
 				
 					reminder()
@@ -122,13 +131,13 @@ try:
 					if not GPIO.input(SAFE_BUTTON_PIN):
 						print("SAFE PIN")
 						# Reset start time to reflect that user is still active
-						start_time = time.time()
+						start_time = time.monotonic()
 						break
 						
 					if GPIO.input(PANICK_BUTTON_PIN):
 						panic()
 					
-					current_time = time.time()
+					current_time = time.monotonic()
 					time.sleep(REFRESH_FREQUENCY)
 				
 				if (current_time-start_time) >= TIMER_PANIC:
@@ -138,7 +147,7 @@ try:
 			if GPIO.input(PANICK_BUTTON_PIN):
 				panic()
 			
-			current_time = time.time()
+			current_time = time.monotonic()
 			GPIO.output(BUZZER_PIN, GPIO.LOW)   
 			
 			time.sleep(REFRESH_FREQUENCY)
@@ -150,3 +159,6 @@ try:
         
 except KeyboardInterrupt:
 	GPIO.cleanup() 
+	# Give a PANIC queued just before exit time to reach the collector
+	if uplink is not None:
+		uplink.close()
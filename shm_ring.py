@@ -0,0 +1,148 @@
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from sample_journal import SAMPLE_DTYPE
+
+# 📌 Shared memory block published by the sampler
+RING_NAME = "rpi_imu_samples"
+RING_CAPACITY = 8192  # ~160 s of samples at 50 Hz
+
+RING_MAGIC = 0x52494E4731  # "RING1"
+
+# Header: magic, capacity, write sequence, sampler start time (wall clock) and the
+# sample period requested by the analyzer (the only header field readers write)
+HEADER_DTYPE = np.dtype([("magic", "<u8"), ("capacity", "<u8"), ("write_seq", "<u8"), ("t0", "<f8"),
+                         ("sample_period", "<f8")])
+HEADER_SIZE = 64
+
+class SampleRing:
+    """
+    Single-writer, multi-reader ring of (t, x, y, z) records in shared memory.
+
+    Every record is stored twice, at slot i and i + capacity, so the newest n
+    records (n <= capacity) are always one contiguous NumPy view with no copy.
+    The writer publishes a record by bumping write_seq after storing it.
+
+    A view starting at sequence number `start` stays intact only while the
+    writer has not lapped it; check is_valid(start) after using a view.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        self.capacity = int(self.header["capacity"])
+        self.records = np.ndarray((2 * self.capacity,), dtype=SAMPLE_DTYPE, buffer=shm.buf, offset=HEADER_SIZE)
+
+    @classmethod
+    def create(cls, name=RING_NAME, capacity=RING_CAPACITY, t0=0.0, sample_period=0.01):
+        """ Create the ring (sampler side), replacing a stale one left by a crash. """
+        size = HEADER_SIZE + 2 * capacity * SAMPLE_DTYPE.itemsize
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        header["capacity"] = capacity
+        header["write_seq"] = 0
+        header["t0"] = t0
+        header["sample_period"] = sample_period
+        header["magic"] = RING_MAGIC
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=RING_NAME):
+        """ Attach to an existing ring (reader side). Raises FileNotFoundError if absent. """
+        # Readers must not unlink the writer's segment when they exit
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        if int(np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)["magic"]) != RING_MAGIC:
+            shm.close()
+            raise ValueError(f"{name} is not a sample ring")
+        return cls(shm, owner=False)
+
+    @property
+    def write_seq(self):
+        return int(self.header["write_seq"])
+
+    @property
+    def t0(self):
+        return float(self.header["t0"])
+
+    @property
+    def sample_period(self):
+        return float(self.header["sample_period"])
+
+    @sample_period.setter
+    def sample_period(self, period):
+        self.header["sample_period"] = period
+
+    def write(self, t, x, y, z):
+        seq = self.write_seq
+        i = seq % self.capacity
+        record = (t, *(np.nan if v is None else v for v in (x, y, z)))
+        self.records[i] = record
+        self.records[i + self.capacity] = record
+        self.header["write_seq"] = seq + 1
+
+    def latest(self, n):
+        """
+        View of the newest n records.
+
+        Returns:
+            (view, start): Structured array view into shared memory, and the
+            sequence number of its first record.
+        """
+        end = self.write_seq
+        n = min(n, end, self.capacity - 1)
+        start = end - n
+        i = start % self.capacity
+        return self.records[i:i + n], start
+
+    def is_valid(self, start):
+        """ True if the record with sequence `start` has not been overwritten. """
+        # The writer may already be storing write_seq, which reuses slot write_seq - capacity
+        return start > self.write_seq - self.capacity
+
+    def close(self):
+        del self.header, self.records
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+class RingReader:
+    """ Cursor over a SampleRing that returns only records it has not seen yet. """
+
+    def __init__(self, ring, from_latest=True):
+        self.ring = ring
+        self.next_seq = ring.write_seq if from_latest else 0
+        self.overruns = 0
+
+    def read_new(self):
+        """
+        View of every record published since the last call.
+
+        Returns:
+            (view, lost): lost counts records the writer overwrote before this
+            reader got to them.
+        """
+        end = self.ring.write_seq
+        oldest = end - self.ring.capacity + 1
+        lost = max(0, oldest - self.next_seq)
+        if lost:
+            self.overruns += lost
+            self.next_seq = oldest
+        i = self.next_seq % self.ring.capacity
+        view = self.ring.records[i:i + end - self.next_seq]
+        self.next_seq = end
+        return view, lost
@@ -16,6 +16,7 @@ from adafruit_blinka.microcontroller.bcm283x.pin import Pin
 import adafruit_bitbangio as bitbangio
 
 from live_respiratory_depression import monitor_breathing
+from sample_journal import SampleJournal
 
 SCL_PIN = 8
 SDA_PIN = 7
@@ -24,6 +25,8 @@ i2c = bitbangio.I2C(Pin(SCL_PIN), Pin(SDA_PIN))
 
 sensor = adafruit_bno055.BNO055_I2C(i2c)
 
+journal = SampleJournal()
+
 start_time = time.time()
 
 def save_to_csv(acc, time, filename):
@@ -104,11 +107,10 @@ if __name__ == "__main__":
             
               print(f"Reading: {lin_motion}C")
             
-            save_to_csv(sensor.linear_acceleration[0], curr_time, 'x-axis')
-            save_to_csv(sensor.linear_acceleration[1], curr_time, 'y-axis')
-            save_to_csv(sensor.linear_acceleration[2], curr_time, 'z-axis')
+            journal.append(start_time + curr_time, *sensor.linear_acceleration)
 
             monitor_breathing()
 
     except KeyboardInterrupt:
+       journal.close()
        print("exiting...")
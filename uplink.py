@@ -0,0 +1,360 @@
+import argparse
+import json
+import os
+import select
+import socket
+import socketserver
+import struct
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+
+# 📌 Collector address (set UPLINK_HOST to enable the uplink on the Pi)
+UPLINK_HOST = os.environ.get("UPLINK_HOST")
+UPLINK_PORT = int(os.environ.get("UPLINK_PORT", 9505))
+
+# 📌 Batching and spooling
+BATCH_SIZE = 250                       # Samples per bulk frame (~5 s at 50 Hz)
+MAX_SPOOL_BYTES = 4 * 1024 * 1024      # Encoded bulk data kept while the link is down
+RECONNECT_DELAY = 2.0
+
+# Frame header: type, payload length
+FRAME_HEADER = struct.Struct("<BI")
+FRAME_SAMPLES = 1
+FRAME_EVENT = 2
+FRAME_ACK = 3
+
+# Quantization: BNO055 linear acceleration resolution is 0.01 m/s²
+TIME_SCALE = 1000      # ms
+ACC_SCALE = 100        # 0.01 m/s²
+MISSING = -(2 ** 31)   # Quantized stand-in for a missing (NaN) reading
+
+# 📌 Delta + zigzag + varint encoding
+def encode_varints(values):
+    out = bytearray()
+    for value in values:
+        value = int(value)
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return out
+
+def decode_varints(data, count, pos=0):
+    values = np.empty(count, dtype=np.int64)
+    for i in range(count):
+        shift = result = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values[i] = result
+    return values, pos
+
+def encode_samples(samples):
+    """
+    Encode (t, x, y, z) rows column by column as zigzag varint deltas.
+
+    Slowly changing signals produce small deltas, so most values take one byte.
+    """
+    samples = np.asarray(samples, dtype=float).reshape(-1, 4)
+    scaled = samples * np.array([TIME_SCALE, ACC_SCALE, ACC_SCALE, ACC_SCALE])
+    quantized = np.where(np.isnan(scaled), MISSING, np.round(np.nan_to_num(scaled))).astype(np.int64)
+    deltas = np.diff(quantized, axis=0, prepend=0)
+    zigzag = (deltas << 1) ^ (deltas >> 63)
+
+    payload = bytearray(struct.pack("<I", len(samples)))
+    for column in zigzag.T:
+        payload += encode_varints(column)
+    return bytes(payload)
+
+def decode_samples(payload):
+    count, = struct.unpack_from("<I", payload)
+    pos, columns = 4, []
+    for _ in range(4):
+        zigzag, pos = decode_varints(payload, count, pos)
+        columns.append(np.cumsum((zigzag >> 1) ^ -(zigzag & 1)))
+    quantized = np.column_stack(columns) if count else np.empty((0, 4), dtype=np.int64)
+    samples = quantized / np.array([TIME_SCALE, ACC_SCALE, ACC_SCALE, ACC_SCALE])
+    samples[quantized == MISSING] = np.nan
+    return samples
+
+def frame(frame_type, payload):
+    return FRAME_HEADER.pack(frame_type, len(payload)) + payload
+
+def read_frame(f):
+    """ Read one frame from a binary stream; returns (type, payload) or None at EOF. """
+    header = f.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    frame_type, length = FRAME_HEADER.unpack(header)
+    payload = f.read(length)
+    if len(payload) < length:
+        return None
+    return frame_type, payload
+
+class UplinkClient:
+    """
+    Batched uplink of samples and alerts over one persistent TCP connection.
+
+    Samples are packed into BATCH_SIZE-sample frames and spooled in memory
+    (bounded by max_spool_bytes, oldest dropped first) until they can be sent.
+    Alerts use a separate priority lane: pending alerts are always sent before
+    the next bulk frame, so they wait behind at most one frame. Alerts stay
+    queued until the collector acks them and are re-sent after a reconnect.
+    """
+
+    def __init__(self, host=UPLINK_HOST, port=UPLINK_PORT, batch_size=BATCH_SIZE,
+                 max_spool_bytes=MAX_SPOOL_BYTES, reconnect_delay=RECONNECT_DELAY):
+        self.address = (host, port)
+        self.batch_size = batch_size
+        self.max_spool_bytes = max_spool_bytes
+        self.reconnect_delay = reconnect_delay
+
+        self.lock = threading.Lock()
+        self.batch = []
+        self.spool = deque()
+        self.spool_bytes = 0
+        self.alerts = deque()
+        self.unacked = {}
+        self.next_alert_id = 0
+        self.session = uuid.uuid4().hex  # Alert ids are unique per (session, id)
+        self.sock = None
+        self.running = False
+        # Written by producers so the sender thread's select() wakes up for new work
+        self.wake_r, self.wake_w = socket.socketpair()
+        self.wake_r.setblocking(False)
+        self.wake_w.setblocking(False)
+
+        # Accounting
+        self.started_at = time.monotonic()
+        self.bytes_sent = 0
+        self.samples_sent = 0
+        self.frames_dropped = 0
+        self.alert_latencies = []
+        self.first_t = None
+        self.last_t = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def add_sample(self, t, x, y, z):
+        if self.first_t is None:
+            self.first_t = t
+        self.last_t = t
+        self.batch.append((t, *(np.nan if v is None else v for v in (x, y, z))))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """ Encode the pending samples into one spooled bulk frame. """
+        if not self.batch:
+            return
+        data = frame(FRAME_SAMPLES, encode_samples(self.batch))
+        count = len(self.batch)
+        self.batch = []
+        with self.lock:
+            self.spool.append((data, count))
+            self.spool_bytes += len(data)
+            while self.spool_bytes > self.max_spool_bytes and len(self.spool) > 1:
+                dropped, _ = self.spool.popleft()
+                self.spool_bytes -= len(dropped)
+                self.frames_dropped += 1
+        self._wake()
+
+    def send_alert(self, kind, state, value=None, created_at=None):
+        """ Queue an alert on the priority lane. created_at is wall-clock time. """
+        with self.lock:
+            alert_id = self.next_alert_id
+            self.next_alert_id += 1
+            event = {"id": alert_id, "session": self.session, "kind": kind, "state": state, "value": value,
+                     "created_at": time.time() if created_at is None else created_at}
+            self.alerts.append(event)
+        self._wake()
+        return alert_id
+
+    def _wake(self):
+        try:
+            self.wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # Already signalled (buffer full) or closed
+
+    def _drain_wakeups(self):
+        try:
+            while self.wake_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _connect(self):
+        try:
+            self.sock = socket.create_connection(self.address, timeout=5)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self.lock:
+                # Anything not acked before the link dropped goes out again
+                self.alerts.extendleft(sorted(self.unacked.values(), key=lambda e: -e["id"]))
+                self.unacked.clear()
+            return True
+        except OSError:
+            self.sock = None
+            return False
+
+    def _read_acks(self):
+        while select.select([self.sock], [], [], 0)[0]:
+            header = self.sock.recv(FRAME_HEADER.size, socket.MSG_WAITALL)
+            if len(header) < FRAME_HEADER.size:
+                raise ConnectionError("collector closed the connection")
+            frame_type, length = FRAME_HEADER.unpack(header)
+            payload = self.sock.recv(length, socket.MSG_WAITALL) if length else b""
+            if frame_type == FRAME_ACK:
+                with self.lock:
+                    event = self.unacked.pop(json.loads(payload)["id"], None)
+                if event is not None:
+                    self.alert_latencies.append(time.time() - event["created_at"])
+
+    def _next_frame(self):
+        """ Pop the next frame to send: alerts first, then bulk data; (None, None) if idle. """
+        with self.lock:
+            if self.alerts:
+                event = self.alerts.popleft()
+                self.unacked[event["id"]] = event
+                return frame(FRAME_EVENT, json.dumps(event).encode()), None
+            if self.spool:
+                data, count = self.spool.popleft()
+                self.spool_bytes -= len(data)
+                return data, (data, count)
+        return None, None
+
+    def _run(self):
+        while self.running:
+            if self.sock is None and not self._connect():
+                time.sleep(self.reconnect_delay)
+                continue
+            bulk = None
+            try:
+                data, bulk = self._next_frame()
+                if data is None:
+                    # Idle: block until an ack arrives or a producer queues work
+                    readable, _, _ = select.select([self.sock, self.wake_r], [], [], 0.5)
+                    if self.wake_r in readable:
+                        self._drain_wakeups()
+                    if self.sock in readable:
+                        self._read_acks()
+                    continue
+                self.sock.sendall(data)
+                self.bytes_sent += len(data)
+                if bulk is not None:
+                    self.samples_sent += bulk[1]
+                self._read_acks()
+            except OSError:
+                with self.lock:
+                    if bulk is not None:
+                        self.spool.appendleft(bulk)
+                        self.spool_bytes += len(bulk[0])
+                self.sock.close()
+                self.sock = None
+
+    def close(self, timeout=5.0):
+        """ Flush pending samples and give the sender up to timeout seconds to drain. """
+        self.flush()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and (self.spool or self.alerts or self.unacked):
+            time.sleep(0.05)
+        self.running = False
+        self._wake()
+        self.thread.join(timeout=1)
+        if self.sock is not None:
+            self.sock.close()
+        self.wake_r.close()
+        self.wake_w.close()
+
+    def stats(self):
+        """
+        Bandwidth and alert delivery latency.
+
+        bytes_per_patient_hour normalises by the span of sample timestamps
+        (monitored time); bytes_per_hour by the client's wall-clock uptime.
+        """
+        hours = max(time.monotonic() - self.started_at, 1e-9) / 3600
+        patient_hours = max((self.last_t or 0) - (self.first_t or 0), 1e-9) / 3600
+        latencies = np.array(self.alert_latencies) if self.alert_latencies else np.zeros(0)
+        return {
+            "bytes_sent": self.bytes_sent,
+            "samples_sent": self.samples_sent,
+            "bytes_per_sample": self.bytes_sent / self.samples_sent if self.samples_sent else 0.0,
+            "bytes_per_hour": self.bytes_sent / hours,
+            "bytes_per_patient_hour": self.bytes_sent / patient_hours,
+            "frames_dropped": self.frames_dropped,
+            "spooled_bytes": self.spool_bytes,
+            "alerts_delivered": len(latencies),
+            "alert_latency_p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "alert_latency_max": float(latencies.max()) if len(latencies) else None,
+        }
+
+def uplink_notifier(client):
+    """ AlertEngine notifier forwarding every raise/clear on the priority lane. """
+    def notify(event):
+        client.send_alert(event.kind, event.state, float(event.value), created_at=event.acquired_at)
+    return notify
+
+# 📌 Local stand-in collector
+class CollectorHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            received = read_frame(self.rfile)
+            if received is None:
+                return
+            frame_type, payload = received
+            self.server.bytes_received += FRAME_HEADER.size + len(payload)
+            if frame_type == FRAME_SAMPLES:
+                self.server.samples.append(decode_samples(payload))
+            elif frame_type == FRAME_EVENT:
+                event = json.loads(payload)
+                # Unacked alerts are re-sent after a reconnect: record each once, ack every copy
+                key = (event.get("session"), event["id"])
+                with self.server.lock:
+                    duplicate = key in self.server.seen
+                    self.server.seen.add(key)
+                if not duplicate:
+                    event["received_at"] = time.time()
+                    self.server.events.append(event)
+                    print(f"🚨 {event['kind']} {event['state']} (delivered in {event['received_at'] - event['created_at']:.3f}s)")
+                self.wfile.write(frame(FRAME_ACK, json.dumps({"id": event["id"]}).encode()))
+                self.wfile.flush()
+
+class Collector(socketserver.ThreadingTCPServer):
+    """ Minimal collector: decodes sample frames, records (once) and acks alerts. """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host="0.0.0.0", port=UPLINK_PORT):
+        super().__init__((host, port), CollectorHandler)
+        self.samples = []
+        self.events = []
+        self.seen = set()
+        self.lock = threading.Lock()
+        self.bytes_received = 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the stand-in uplink collector.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=UPLINK_PORT)
+    args = parser.parse_args()
+
+    with Collector(args.host, args.port) as server:
+        print(f"📡 Collector listening on {args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print(f"Received {sum(len(s) for s in server.samples)} samples, {len(server.events)} alerts, "
+                  f"{server.bytes_received} bytes")